@@ -5,9 +5,19 @@ Supports multiple coins with USDT+USDC aggregation
 """
 
 import os
-from datetime import datetime, timedelta
-from flask import Flask, jsonify, request, render_template, send_from_directory, Response
+import csv
+import io
+import hashlib
+import functools
+import orjson
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from flask import Flask, g, jsonify, request, render_template, send_from_directory, Response, stream_with_context, make_response
 from apscheduler.schedulers.background import BackgroundScheduler
+from flask_orjson import OrjsonProvider
+from flask_caching import Cache
+from flask_compress import Compress
 import database as db
 import binance_fetcher as bf
 import etf_fetcher as ef
@@ -18,6 +28,236 @@ import config
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
+# Serialize all jsonify() responses with orjson instead of the stdlib json module.
+# Keep output compact and in insertion order (no OPT_INDENT_2 / OPT_SORT_KEYS),
+# including when DEBUG is enabled
+app.json = OrjsonProvider(app)
+app.json.option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+# Compress JSON and CSV responses (including the streamed CSV export)
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/csv']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = 4
+Compress(app)
+
+# Read-only responses only change when a sync or scan writes new rows. Views
+# with a data version (see conditional_etag) are cached under keys that include
+# it, so a write from any process is picked up everywhere. Views without one
+# rely on cache.clear() after writes, which only reaches other processes when
+# the cache is shared, so they are only cached with REDIS_URL set.
+RESPONSE_CACHE_TIMEOUT = 3600  # seconds
+
+# Futures endpoints reflect live Binance data, so they only get short TTLs
+FUTURES_CACHE_TIMEOUT = 60
+FUTURES_CURRENT_CACHE_TIMEOUT = 15
+LIQUIDATION_CACHE_TIMEOUT = 30
+
+# With REDIS_URL set, all gunicorn workers share one cache (and one invalidation);
+# otherwise each process keeps its own in-memory cache
+REDIS_URL = os.environ.get('REDIS_URL', '').strip()
+
+if REDIS_URL:
+    cache = Cache(app, config={
+        'CACHE_TYPE': 'RedisCache',
+        'CACHE_REDIS_URL': REDIS_URL,
+        'CACHE_KEY_PREFIX': 'binance-watcher:',
+        'CACHE_DEFAULT_TIMEOUT': RESPONSE_CACHE_TIMEOUT
+    })
+else:
+    cache = Cache(app, config={
+        'CACHE_TYPE': 'SimpleCache',
+        'CACHE_DEFAULT_TIMEOUT': RESPONSE_CACHE_TIMEOUT
+    })
+
+
+def without_shared_cache():
+    """Cache 'unless' hook: skip caching unversioned views on a per-process cache"""
+    return not REDIS_URL
+
+
+def is_success_response(rv):
+    """Cache response filter: skip (body, status) tuples returned for errors"""
+    return not (isinstance(rv, tuple) and len(rv) > 1 and rv[1] != 200)
+
+
+# Maximum number of coins synced/scanned concurrently (work is I/O-bound)
+SYNC_MAX_WORKERS = 8
+
+# Hard cap on rows returned by list endpoints; larger results are paged
+MAX_ROWS = 5000
+
+# CSV export columns, and a getter turning a row dict into a tuple in that order
+EXPORT_FIELDS = (
+    'date', 'coin', 'open_price', 'close_price', 'high_price', 'low_price',
+    'total_volume', 'buy_volume', 'sell_volume', 'net_volume',
+    'buy_volume_usd', 'sell_volume_usd', 'net_volume_usd', 'price_change_pct'
+)
+get_export_row = itemgetter(*EXPORT_FIELDS)
+
+
+def get_row_limit(default=MAX_ROWS):
+    """Get the 'limit' query param, capped at MAX_ROWS"""
+    limit = request.args.get('limit', default, type=int)
+    if not limit or limit < 0:
+        limit = default
+    return min(limit, MAX_ROWS)
+
+
+def wants_columns():
+    """True if the client asked for column arrays (?format=columns) instead of row objects"""
+    return request.args.get('format') == 'columns'
+
+
+def row_count(data):
+    """Number of rows in a list of row dicts or a {column: [values]} result"""
+    return len(data['date']) if isinstance(data, dict) else len(data)
+
+
+def next_cursor(data, limit):
+    """Pagination cursor for the next page: the last row's date if the page is full"""
+    if isinstance(data, dict):
+        dates = data['date']
+        return dates[-1] if dates and len(dates) == limit else None
+    return data[-1]['date'] if data and len(data) == limit else None
+
+
+def run_per_coin(func, coins):
+    """Run func(coin) for each coin on a thread pool, returning results in coin order"""
+    if not coins:
+        return []
+    with ThreadPoolExecutor(max_workers=min(SYNC_MAX_WORKERS, len(coins))) as executor:
+        return list(executor.map(func, coins))
+
+
+def conditional_etag(get_version):
+    """
+    Decorator adding a strong ETag to a GET endpoint and answering 304 on a match
+    
+    The ETag is built from the request path + query string and get_version(),
+    a cheap query that changes whenever the underlying data changes. A client
+    holding the current ETag skips the view (DB query and JSON build) entirely.
+    
+    The version is read once per request and kept in g.data_version, so a
+    response cache inside this decorator can key on the same value (see
+    versioned_cache_prefix()) instead of serving a body older than the ETag.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.data_version = get_version()
+            version = f"{request.full_path}:{g.data_version}"
+            etag = hashlib.md5(version.encode()).hexdigest()
+            
+            # Compression appends the encoding to the ETag ("<etag>:gzip")
+            if any(tag.split(':', 1)[0] == etag for tag in request.if_none_match):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            # Let browsers keep the body but always revalidate it
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def versioned_cache_prefix():
+    """
+    Response cache key prefix for views wrapped in conditional_etag()
+    
+    Includes the data version the ETag was built from, so every process
+    misses its cache as soon as any process writes new data, rather than
+    relying on a per-process cache.clear().
+    
+    The key only protects fields read no earlier than the version. Views
+    cached this way must not use per-process snapshots such as
+    db.get_date_range() or db.get_all_coins(), which can predate it; take
+    sync_status fields from g.sync_status (see volume_data_version()).
+    """
+    return f"view/{request.path}/{g.data_version}/"
+
+
+def coin_data_version(coin):
+    """Cheap version tag for a coin's volume data: its last sync timestamp"""
+    status = db.get_sync_status(coin=coin)
+    return status['last_sync_timestamp'] if status else None
+
+
+def volume_data_version():
+    """
+    Data version for volume endpoints
+    
+    The sync_status row the version comes from is kept in g.sync_status, so
+    a view cached on this version can take sync_status fields from the same
+    read instead of the per-process snapshot, which may predate the version.
+    """
+    g.sync_status = db.get_sync_status(coin=request.args.get('coin', 'BTC').upper())
+    return g.sync_status['last_sync_timestamp'] if g.sync_status else None
+
+
+def etf_data_version():
+    """Data version for ETF endpoints: the coin's latest ETF date and row count"""
+    coin = request.args.get('coin', 'BTC').upper()
+    date_range = db.get_etf_date_range(coin=coin)
+    return f"{date_range['latest']}:{date_range['count']}" if date_range else None
+
+
+def get_volume_data_with_indicators(coin, start_date=None, end_date=None, limit=None, before_date=None):
+    """
+    Volume data (date ascending) with technical indicators
+    
+    Results are memoized per query and data version, so repeated requests
+    between syncs skip the indicator calculation. Returns a new list on each
+    call, but the row dicts are shared with the cache and must not be modified.
+    """
+    return list(_indicator_data_cache(coin, start_date, end_date, limit, before_date,
+                                      coin_data_version(coin)))
+
+
+@functools.lru_cache(maxsize=32)
+def _indicator_data_cache(coin, start_date, end_date, limit, before_date, data_version):
+    """Memoized body of get_volume_data_with_indicators()"""
+    data = db.get_volume_data(
+        coin=coin,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit,
+        order='asc',
+        before_date=before_date
+    )
+    return tuple(ind.enhance_volume_data_with_indicators(data))
+
+
+def prewarm_indicators(coin):
+    """
+    Compute indicators for the default include_indicators=true query ahead
+    of the first request for it
+    
+    The memo is per process, so this only helps the process it runs in: each
+    gunicorn worker calls it at startup (see gunicorn.conf.py), and a sync
+    calls it in the worker that ran the sync. Other workers compute the new
+    version on their first request after a sync.
+    """
+    try:
+        get_volume_data_with_indicators(coin=coin, limit=MAX_ROWS)
+    except Exception as e:
+        print(f"  [{coin}] Indicator pre-warm failed: {e}")
+
+
+def clear_caches():
+    """
+    Drop cached responses and indicator results after new data is written
+    
+    Only this process's entries (or all of them with a shared REDIS_URL
+    cache); other processes rely on versioned cache keys to see the write.
+    """
+    cache.clear()
+    _indicator_data_cache.cache_clear()
+
+
 # =============================================================================
 # API ENDPOINTS
 # =============================================================================
@@ -28,23 +268,34 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/api/config', methods=['GET'])
-def get_config():
-    """Get current configuration"""
+def build_config_payload():
+    """Build the /api/config response body from the current configuration"""
     # Convert ETF mappings from Dict[str, List[str]] to Dict[str, str]
     # Frontend expects coin -> "IBIT|FBTC|GBTC" format
     raw_mappings = config.get_etf_mappings()
     etf_mappings = {coin: '|'.join(tickers) for coin, tickers in raw_mappings.items()}
     
-    return jsonify({
+    return {
         'success': True,
         'coins': config.get_coins(),
         'sync_hour': config.get_sync_hour(),
         'etf_mappings': etf_mappings
-    })
+    }
+
+
+# Configuration is static for the life of the process, so build it once
+CONFIG_PAYLOAD = build_config_payload()
+
+
+@app.route('/api/config', methods=['GET'])
+def get_config():
+    """Get current configuration"""
+    return jsonify(CONFIG_PAYLOAD)
 
 
 @app.route('/api/volumes', methods=['GET'])
+@conditional_etag(volume_data_version)
+@cache.cached(query_string=True, key_prefix=versioned_cache_prefix)
 def get_volumes():
     """
     Get volume data with optional filters and technical indicators
@@ -53,39 +304,51 @@ def get_volumes():
         coin: Base coin (default: BTC) - NOT the trading pair!
         start_date: Start date (YYYY-MM-DD)
         end_date: End date (YYYY-MM-DD)
-        limit: Max records to return
+        limit: Max records to return (default and max: MAX_ROWS)
+        before_date: Pagination cursor, pass the previous page's next_cursor
         include_indicators: Include technical indicators (default: false)
+        format: 'columns' returns data as {column: [values]} (without indicators)
     """
     coin = request.args.get('coin', 'BTC').upper()
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    limit = request.args.get('limit', type=int)
+    limit = get_row_limit()
+    before_date = request.args.get('before_date')
     include_indicators = request.args.get('include_indicators', 'false').lower() == 'true'
     
-    data = db.get_volume_data(
-        coin=coin,
-        start_date=start_date,
-        end_date=end_date,
-        limit=limit
-    )
-    
     # Add technical indicators if requested
-    if include_indicators and data:
-        # Sort by date ascending for indicator calculation
-        data_asc = sorted(data, key=lambda x: x['date'])
-        data_asc = ind.enhance_volume_data_with_indicators(data_asc)
-        # Sort back to descending
-        data = sorted(data_asc, key=lambda x: x['date'], reverse=True)
+    if include_indicators:
+        data = get_volume_data_with_indicators(
+            coin=coin,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            before_date=before_date
+        )
+        # Indicators are calculated on ascending dates, return descending
+        data.reverse()
+    else:
+        data = db.get_volume_data(
+            coin=coin,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit,
+            before_date=before_date,
+            columnar=wants_columns()
+        )
     
     return jsonify({
         'success': True,
         'coin': coin,
-        'count': len(data),
+        'count': row_count(data),
+        'next_cursor': next_cursor(data, limit),
         'data': data
     })
 
 
 @app.route('/api/volumes/summary', methods=['GET'])
+@conditional_etag(volume_data_version)
+@cache.cached(query_string=True, key_prefix=versioned_cache_prefix)
 def get_summary():
     """
     Get aggregated volume statistics
@@ -98,7 +361,8 @@ def get_summary():
     days = request.args.get('days', type=int)
     
     summary = db.get_volume_summary(coin=coin, days=days)
-    date_range = db.get_date_range(coin=coin)
+    # From the same sync_status read as the ETag and cache key version
+    date_range = db.date_range_from_status(g.sync_status)
     
     return jsonify({
         'success': True,
@@ -110,6 +374,8 @@ def get_summary():
 
 
 @app.route('/api/volumes/cumulative', methods=['GET'])
+@conditional_etag(volume_data_version)
+@cache.cached(query_string=True, key_prefix=versioned_cache_prefix)
 def get_cumulative():
     """
     Get cumulative net volume over time
@@ -117,16 +383,28 @@ def get_cumulative():
     Query params:
         coin: Base coin (default: BTC)
         start_date: Start date (YYYY-MM-DD)
+        limit: Max records to return (default and max: MAX_ROWS)
+        after_date: Pagination cursor, pass the previous page's next_cursor
+        format: 'columns' returns data as {column: [values]}
     """
     coin = request.args.get('coin', 'BTC').upper()
     start_date = request.args.get('start_date')
+    limit = get_row_limit()
+    after_date = request.args.get('after_date')
     
-    data = db.get_cumulative_volume(coin=coin, start_date=start_date)
+    data = db.get_cumulative_volume(
+        coin=coin,
+        start_date=start_date,
+        after_date=after_date,
+        limit=limit,
+        columnar=wants_columns()
+    )
     
     return jsonify({
         'success': True,
         'coin': coin,
-        'count': len(data),
+        'count': row_count(data),
+        'next_cursor': next_cursor(data, limit),
         'data': data
     })
 
@@ -150,32 +428,43 @@ def sync_data():
     else:
         coins_to_sync = config.get_coins()
     
-    total_records = 0
-    results = {}
-    
-    for coin in coins_to_sync:
+    def sync_coin(coin):
+        """Returns (result entry or None, record count)"""
         try:
-            if full_sync:
-                # Fetch all historical data for both USDT and USDC pairs
-                volume_data = bf.fetch_coin_data(coin=coin, days=None)
+            if full_sync or not db.get_latest_date(coin):
+                # Full sync (or no data yet): stream all history for both
+                # USDT and USDC pairs into the database batch by batch
+                count = bf.sync_coin_history(coin, db.upsert_volume_rows)
             else:
-                # Incremental sync: fetch recent data
-                latest_date = db.get_latest_date(coin)
-                if latest_date:
-                    # Fetch from last date + a few days overlap
-                    start_date = (datetime.strptime(latest_date, '%Y-%m-%d') - timedelta(days=3)).strftime('%Y-%m-%d')
-                    volume_data = bf.fetch_coin_data(coin=coin, days=config.get_sync_days())
-                else:
-                    # No data yet, do full sync
-                    volume_data = bf.fetch_coin_data(coin=coin, days=None)
+                # Incremental sync: re-fetch the last SYNC_DAYS days, overlapping what we already have
+                volume_data = bf.fetch_coin_data(coin=coin, days=config.get_sync_days())
+                db.upsert_volume_data(volume_data)
+                count = len(volume_data)
             
-            if volume_data:
-                count = db.upsert_volume_data(volume_data)
+            if count:
                 db.update_sync_status(coin)
-                results[coin] = len(volume_data)
-                total_records += len(volume_data)
+                return count, count
+            return None, 0
         except Exception as e:
-            results[coin] = f"Error: {str(e)}"
+            return f"Error: {str(e)}", 0
+    
+    total_records = 0
+    results = {}
+    synced_coins = []
+    
+    # Coins are independent, so fetch them concurrently
+    for coin, (result, count) in zip(coins_to_sync, run_per_coin(sync_coin, coins_to_sync)):
+        if result is not None:
+            results[coin] = result
+        if count:
+            synced_coins.append(coin)
+        total_records += count
+    
+    if total_records:
+        clear_caches()
+    
+    for coin in synced_coins:
+        prewarm_indicators(coin)
     
     return jsonify({
         'success': True,
@@ -225,6 +514,8 @@ def get_coins():
 # =============================================================================
 
 @app.route('/api/etf', methods=['GET'])
+@conditional_etag(etf_data_version)
+@cache.cached(query_string=True, key_prefix=versioned_cache_prefix)
 def get_etf_volumes():
     """
     Get ETF volume data for a coin
@@ -233,10 +524,15 @@ def get_etf_volumes():
         coin: Base coin (default: BTC)
         start_date: Start date (YYYY-MM-DD)
         end_date: End date (YYYY-MM-DD)
+        limit: Max records to return (default and max: MAX_ROWS)
+        before_date: Pagination cursor, pass the previous page's next_cursor
+        format: 'columns' returns data as {column: [values]}
     """
     coin = request.args.get('coin', 'BTC').upper()
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
+    limit = get_row_limit()
+    before_date = request.args.get('before_date')
     
     # Check if coin has ETF mapping
     etf_tickers = config.get_etfs_for_coin(coin)
@@ -249,7 +545,10 @@ def get_etf_volumes():
     data = db.get_etf_data(
         coin=coin,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        limit=limit,
+        before_date=before_date,
+        columnar=wants_columns()
     )
     
     return jsonify({
@@ -257,7 +556,8 @@ def get_etf_volumes():
         'coin': coin,
         'etf_tickers': etf_tickers,  # List of all ETF tickers
         'etf_ticker': '|'.join(etf_tickers),  # Combined string for display
-        'count': len(data),
+        'count': row_count(data),
+        'next_cursor': next_cursor(data, limit),
         'data': data
     })
 
@@ -279,25 +579,30 @@ def sync_etf_data():
     else:
         coins_to_sync = config.get_coins_with_etf()
     
-    total_records = 0
-    results = {}
-    
-    for coin in coins_to_sync:
+    def sync_coin(coin):
+        """Returns (result message, record count)"""
         etf_ticker = config.get_etf_for_coin(coin)
         if not etf_ticker:
-            results[coin] = "No ETF configured"
-            continue
+            return "No ETF configured", 0
         
         try:
             etf_data = ef.fetch_etf_for_coin(coin)
             if etf_data:
                 db.upsert_etf_data(etf_data)
-                results[coin] = f"{len(etf_data)} records ({etf_ticker})"
-                total_records += len(etf_data)
-            else:
-                results[coin] = "No data found"
+                return f"{len(etf_data)} records ({etf_ticker})", len(etf_data)
+            return "No data found", 0
         except Exception as e:
-            results[coin] = f"Error: {str(e)}"
+            return f"Error: {str(e)}", 0
+    
+    total_records = 0
+    results = {}
+    
+    for coin, (result, count) in zip(coins_to_sync, run_per_coin(sync_coin, coins_to_sync)):
+        results[coin] = result
+        total_records += count
+    
+    if total_records:
+        clear_caches()
     
     return jsonify({
         'success': True,
@@ -320,32 +625,33 @@ def export_data():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    data = db.get_volume_data(
+    rows = db.iter_volume_data(
         coin=coin,
         start_date=start_date,
         end_date=end_date
     )
     
-    if not data:
+    # Peek at the first row so an empty export can still return a 404
+    first_row = next(rows, None)
+    if first_row is None:
         return jsonify({'success': False, 'message': 'No data found'}), 404
     
-    # Generate CSV
-    import csv
-    import io
-    
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=[
-        'date', 'coin', 'open_price', 'close_price', 'high_price', 'low_price',
-        'total_volume', 'buy_volume', 'sell_volume', 'net_volume',
-        'buy_volume_usd', 'sell_volume_usd', 'net_volume_usd', 'price_change_pct'
-    ])
-    writer.writeheader()
-    
-    for row in data:
-        writer.writerow(row)
+    def generate():
+        # Stream the CSV row by row through a small reusable buffer
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        writer.writerow(get_export_row(first_row))
+        yield buffer.getvalue()
+        
+        for row in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(get_export_row(row))
+            yield buffer.getvalue()
     
     return Response(
-        output.getvalue(),
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': f'attachment; filename={coin}_volume_data.csv'}
     )
@@ -366,14 +672,16 @@ def get_alerts():
         end_date: End date (YYYY-MM-DD)
         severity: Filter by severity (critical, high, medium, low)
         alert_type: Filter by alert type
-        limit: Max records (default: 100)
+        limit: Max records (default: 100, max: MAX_ROWS)
+        metadata: Include per-alert metadata fields (default: true)
     """
     coin = request.args.get('coin')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     severity = request.args.get('severity')
     alert_type = request.args.get('alert_type')
-    limit = request.args.get('limit', 100, type=int)
+    limit = get_row_limit(default=100)
+    include_metadata = request.args.get('metadata', 'true').lower() == 'true'
     
     alerts = db.get_smart_alerts(
         coin=coin,
@@ -381,7 +689,8 @@ def get_alerts():
         end_date=end_date,
         severity=severity,
         alert_type=alert_type,
-        limit=limit
+        limit=limit,
+        include_metadata=include_metadata
     )
     
     return jsonify({
@@ -392,6 +701,7 @@ def get_alerts():
 
 
 @app.route('/api/alerts/summary', methods=['GET'])
+@cache.cached(query_string=True, unless=without_shared_cache)
 def get_alerts_summary():
     """
     Get summary of recent alerts
@@ -442,42 +752,35 @@ def scan_for_alerts():
     else:
         coins_to_scan = config.get_coins()
     
-    total_alerts = 0
-    results = {}
-    
-    for coin in coins_to_scan:
+    def scan_coin(coin):
+        """Returns (result message, alert count)"""
         try:
-            # Get recent data with indicators
-            volume_data = db.get_volume_data(coin=coin, limit=days + 30)
-            
-            if not volume_data or len(volume_data) < 2:
-                results[coin] = "Insufficient data"
-                continue
-            
-            # Sort ascending for calculations
-            volume_data = sorted(volume_data, key=lambda x: x['date'])
+            # Get recent data with indicators (ascending for calculations)
+            volume_data = get_volume_data_with_indicators(coin=coin, limit=days + 30)
             
-            # Add technical indicators
-            volume_data = ind.enhance_volume_data_with_indicators(volume_data)
+            if len(volume_data) < 2:
+                return "Insufficient data", 0
             
             # Detect smart actions on recent days
-            alerts_for_coin = []
-            for i in range(max(0, len(volume_data) - days), len(volume_data)):
-                current_candle = volume_data[i]
-                historical = volume_data[max(0, i - 30):i]
-                
-                alerts = wd.detect_all_smart_actions(current_candle, historical)
-                alerts_for_coin.extend(alerts)
+            alerts_for_coin = wd.detect_smart_actions_in_series(volume_data, days)
             
-            # Save alerts to database
-            for alert in alerts_for_coin:
-                db.upsert_smart_alert(alert)
+            # Save alerts to database in one transaction
+            db.upsert_smart_alerts(alerts_for_coin)
             
-            results[coin] = f"{len(alerts_for_coin)} alerts"
-            total_alerts += len(alerts_for_coin)
+            return f"{len(alerts_for_coin)} alerts", len(alerts_for_coin)
             
         except Exception as e:
-            results[coin] = f"Error: {str(e)}"
+            return f"Error: {str(e)}", 0
+    
+    total_alerts = 0
+    results = {}
+    
+    for coin, (result, count) in zip(coins_to_scan, run_per_coin(scan_coin, coins_to_scan)):
+        results[coin] = result
+        total_alerts += count
+    
+    if total_alerts:
+        clear_caches()
     
     return jsonify({
         'success': True,
@@ -491,6 +794,8 @@ def scan_for_alerts():
 # =============================================================================
 
 @app.route('/api/futures', methods=['GET'])
+@cache.cached(timeout=FUTURES_CACHE_TIMEOUT, query_string=True,
+              response_filter=is_success_response)
 def get_futures_data():
     """
     Get futures metrics (premium, funding rate, OI)
@@ -499,29 +804,35 @@ def get_futures_data():
         coin: Base coin (default: BTC)
         start_date: Start date (YYYY-MM-DD)
         end_date: End date (YYYY-MM-DD)
-        limit: Max records (default: 30)
+        limit: Max records (default: 30, max: MAX_ROWS)
+        before_date: Pagination cursor, pass the previous page's next_cursor
     """
     coin = request.args.get('coin', 'BTC').upper()
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    limit = request.args.get('limit', 30, type=int)
+    limit = get_row_limit(default=30)
+    before_date = request.args.get('before_date')
     
     metrics = db.get_futures_metrics(
         coin=coin,
         start_date=start_date,
         end_date=end_date,
-        limit=limit
+        limit=limit,
+        before_date=before_date
     )
     
     return jsonify({
         'success': True,
         'coin': coin,
         'count': len(metrics),
+        'next_cursor': next_cursor(metrics, limit),
         'data': metrics
     })
 
 
 @app.route('/api/futures/current', methods=['GET'])
+@cache.cached(timeout=FUTURES_CURRENT_CACHE_TIMEOUT, query_string=True,
+              response_filter=is_success_response)
 def get_current_futures():
     """
     Get current real-time futures metrics
@@ -552,9 +863,13 @@ def get_current_futures():
         db.upsert_futures_metrics(metrics)
         
         # Save alerts
+        today = datetime.now().strftime('%Y-%m-%d')
         for alert in alerts:
-            alert['date'] = datetime.now().strftime('%Y-%m-%d')
-            db.upsert_smart_alert(alert)
+            alert['date'] = today
+        db.upsert_smart_alerts(alerts)
+        
+        if alerts:
+            clear_caches()
         
         return jsonify({
             'success': True,
@@ -571,6 +886,8 @@ def get_current_futures():
 
 
 @app.route('/api/futures/liquidations', methods=['GET'])
+@cache.cached(timeout=LIQUIDATION_CACHE_TIMEOUT, query_string=True,
+              response_filter=is_success_response)
 def get_liquidation_zones():
     """
     Get estimated liquidation zones
@@ -607,6 +924,85 @@ def get_liquidation_zones():
 # BACKGROUND SCHEDULER
 # =============================================================================
 
+def sync_coin_with_fallback(coin, etf_tickers=None, sync_days=None):
+    """Full sync for one coin, falling back to incremental sync on failure
+    
+    Also runs smart alert detection and ETF sync for the coin.
+    etf_tickers and sync_days default to the configured values when not
+    supplied by the caller's sync plan.
+    """
+    if etf_tickers is None:
+        etf_tickers = config.get_etfs_for_coin(coin)
+    if sync_days is None:
+        sync_days = config.get_sync_days()
+    
+    full_sync_success = False
+    
+    # ETF data comes from a different host, so fetch it while the Binance
+    # history is downloading instead of after it
+    etf_future = None
+    if etf_tickers:
+        etf_executor = ThreadPoolExecutor(max_workers=1)
+        etf_future = etf_executor.submit(ef.fetch_etf_for_coin, coin)
+        etf_executor.shutdown(wait=False)
+    
+    # Try full sync first (only the gap since each pair's latest stored day
+    # is downloaded; older closed candles are already in the database)
+    try:
+        print(f"  [{coin}] Attempting full sync...")
+        count = bf.sync_coin_history(coin, db.upsert_volume_rows,
+                                     resume_dates=db.get_latest_dates_by_symbol(coin))
+        
+        if count:
+            db.update_sync_status(coin)
+            print(f"  [{coin}] Full sync complete: {count} records")
+            full_sync_success = True
+            
+            # Run smart alert detection on recent data
+            try:
+                print(f"  [{coin}] Running smart alert detection...")
+                recent_data = get_volume_data_with_indicators(coin=coin, limit=37)  # 30 for context + 7 for scanning
+                if len(recent_data) >= 2:
+                    alerts_found = wd.detect_smart_actions_in_series(recent_data, 7)
+                    
+                    db.upsert_smart_alerts(alerts_found)
+                    print(f"  [{coin}] Smart alerts: {len(alerts_found)} detected")
+            except Exception as alert_err:
+                print(f"  [{coin}] Alert detection failed: {alert_err}")
+        
+        # Also sync ETF data if coin has ETF mapping
+        if etf_future:
+            try:
+                etf_data = etf_future.result()
+                if etf_data:
+                    db.upsert_etf_data(etf_data)
+                    print(f"  [{coin}] ETF sync complete: {len(etf_data)} records")
+            except Exception as etf_err:
+                print(f"  [{coin}] ETF sync failed: {etf_err}")
+                # ETF failure doesn't trigger fallback, just log it
+    
+    except Exception as e:
+        print(f"  [{coin}] Full sync failed: {e}")
+        print(f"  [{coin}] Falling back to incremental sync...")
+        
+        # Fallback to incremental sync
+        try:
+            latest_date = db.get_latest_date(coin)
+            if latest_date:
+                volume_data = bf.fetch_coin_data(coin=coin, days=sync_days)
+            else:
+                # Still no data and full sync failed - skip
+                print(f"  [{coin}] No existing data and full sync failed, skipping")
+                return
+            
+            if volume_data:
+                db.upsert_volume_data(volume_data)
+                db.update_sync_status(coin)
+                print(f"  [{coin}] Incremental sync complete: {len(volume_data)} records")
+        except Exception as fallback_err:
+            print(f"  [{coin}] Incremental sync also failed: {fallback_err}")
+
+
 def scheduled_sync():
     """Run scheduled daily full sync for all configured coins
     
@@ -616,82 +1012,31 @@ def scheduled_sync():
     """
     print(f"[{datetime.now()}] Running scheduled FULL sync...")
     
+    # Resolve per-coin settings once up front rather than inside every worker
     coins = config.get_coins()
+    sync_days = config.get_sync_days()
+    etfs = {coin: config.get_etfs_for_coin(coin) for coin in coins}
     
-    for coin in coins:
-        full_sync_success = False
-        
-        # Try full sync first
-        try:
-            print(f"  [{coin}] Attempting full sync...")
-            volume_data = bf.fetch_coin_data(coin=coin, days=None)
-            
-            if volume_data:
-                db.upsert_volume_data(volume_data)
-                db.update_sync_status(coin)
-                print(f"  [{coin}] Full sync complete: {len(volume_data)} records")
-                full_sync_success = True
-                
-                # Run smart alert detection on recent data
-                try:
-                    print(f"  [{coin}] Running smart alert detection...")
-                    recent_data = db.get_volume_data(coin=coin, limit=37)  # 30 for context + 7 for scanning
-                    if recent_data and len(recent_data) >= 2:
-                        recent_data = sorted(recent_data, key=lambda x: x['date'])
-                        recent_data = ind.enhance_volume_data_with_indicators(recent_data)
-                        
-                        alerts_found = 0
-                        for i in range(max(0, len(recent_data) - 7), len(recent_data)):
-                            current = recent_data[i]
-                            historical = recent_data[max(0, i - 30):i]
-                            alerts = wd.detect_all_smart_actions(current, historical)
-                            for alert in alerts:
-                                db.upsert_smart_alert(alert)
-                                alerts_found += 1
-                        
-                        print(f"  [{coin}] Smart alerts: {alerts_found} detected")
-                except Exception as alert_err:
-                    print(f"  [{coin}] Alert detection failed: {alert_err}")
-            
-            # Also sync ETF data if coin has ETF mapping
-            etf_tickers = config.get_etfs_for_coin(coin)
-            if etf_tickers:
-                try:
-                    etf_data = ef.fetch_etf_for_coin(coin)
-                    if etf_data:
-                        db.upsert_etf_data(etf_data)
-                        print(f"  [{coin}] ETF sync complete: {len(etf_data)} records")
-                except Exception as etf_err:
-                    print(f"  [{coin}] ETF sync failed: {etf_err}")
-                    # ETF failure doesn't trigger fallback, just log it
-                    
-        except Exception as e:
-            print(f"  [{coin}] Full sync failed: {e}")
-            print(f"  [{coin}] Falling back to incremental sync...")
-            
-            # Fallback to incremental sync
-            try:
-                latest_date = db.get_latest_date(coin)
-                if latest_date:
-                    volume_data = bf.fetch_coin_data(coin=coin, days=config.get_sync_days())
-                else:
-                    # Still no data and full sync failed - skip
-                    print(f"  [{coin}] No existing data and full sync failed, skipping")
-                    continue
-                
-                if volume_data:
-                    db.upsert_volume_data(volume_data)
-                    db.update_sync_status(coin)
-                    print(f"  [{coin}] Incremental sync complete: {len(volume_data)} records")
-            except Exception as fallback_err:
-                print(f"  [{coin}] Incremental sync also failed: {fallback_err}")
+    def sync_coin(coin):
+        sync_coin_with_fallback(coin, etf_tickers=etfs[coin], sync_days=sync_days)
     
+    # Coins are independent, so sync them concurrently
+    run_per_coin(sync_coin, coins)
+    
+    clear_caches()
+    
+    for coin in coins:
+        prewarm_indicators(coin)
     print(f"[{datetime.now()}] Scheduled sync complete")
 
 
 def init_scheduler():
     """Initialize the background scheduler"""
-    scheduler = BackgroundScheduler()
+    # Never run overlapping syncs, and collapse missed runs into a single one
+    scheduler = BackgroundScheduler(job_defaults={
+        'coalesce': True,
+        'max_instances': 1
+    })
     
     sync_hour = config.get_sync_hour()
     
@@ -701,7 +1046,11 @@ def init_scheduler():
         'cron',
         hour=sync_hour,
         minute=5,
-        id='daily_sync'
+        id='daily_sync',
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,  # Still run if up to an hour late
+        replace_existing=True
     )
     
     scheduler.start()
@@ -717,7 +1066,7 @@ def initial_sync():
     """Perform initial data sync if database is empty"""
     coins = config.get_coins()
     
-    for coin in coins:
+    def sync_coin(coin):
         date_range = db.get_date_range(coin)
         
         if not date_range or not date_range.get('count'):
@@ -726,20 +1075,27 @@ def initial_sync():
             def progress(count, msg):
                 print(f"  {msg} ({count} records)")
             
-            volume_data = bf.fetch_coin_data(
-                coin=coin,
-                days=None,
+            # Collect this coin's history and bulk load it as soon as the coin
+            # finishes, so only the coins in flight are held in memory and a
+            # slow or failing coin doesn't hold back the others
+            rows = []
+            count = bf.sync_coin_history(
+                coin,
+                rows.extend,
                 progress_callback=progress
             )
             
-            if volume_data:
-                db.upsert_volume_data(volume_data)
+            if count:
+                db.bulk_load_volume_rows(rows)
                 db.update_sync_status(coin)
-                print(f"Initial sync complete for {coin}. Loaded {len(volume_data)} records.")
+                clear_caches()
+                print(f"Initial sync complete for {coin}. Loaded {count} records.")
             else:
                 print(f"Warning: Could not fetch data for {coin}.")
         else:
             print(f"{coin}: {date_range['count']} days from {date_range['earliest']} to {date_range['latest']}")
+    
+    run_per_coin(sync_coin, coins)
 
 
 # Initialize database
@@ -766,5 +1122,7 @@ if __name__ == '__main__':
     # Run Flask app
     port = config.get_port()
     debug = config.is_debug()
-    print(f"\nStarting server on http://0.0.0.0:{port}")
+    print(f"\nStarting development server on http://0.0.0.0:{port}")
+    print("For production use gunicorn instead, e.g.:")
+    print("  RUN_SCHEDULER=1 gunicorn wsgi:application --preload -k gthread --workers 2 --threads 4 --bind 0.0.0.0:$PORT")
     app.run(host='0.0.0.0', port=port, debug=debug)
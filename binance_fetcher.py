@@ -4,25 +4,155 @@ Supports fetching all historical data with pagination
 Includes proxy support and multi-pair aggregation
 """
 
+import numpy as np
+import orjson
 import requests
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta, timezone
+from itertools import repeat
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 import config
 
 # Binance API base URL
 BASE_URL = "https://api.binance.com/api/v3"
 
-# Rate limiting - Binance allows 1200 requests per minute
-REQUEST_DELAY = 0.1  # 100ms between requests
+# Rate limiting - Binance allows 1200 request weight per minute per IP
+WEIGHT_LIMIT_PER_MINUTE = 1200
+
+# Request weights of the endpoints we call
+KLINES_WEIGHT = 2
+EXCHANGE_INFO_WEIGHT = 20
 
 # Maximum candles per request
 MAX_CANDLES = 1000
 
+# Fixed-length kline intervals in milliseconds ('1M' varies, so it is not listed)
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000,
+    '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000
+}
+
+# Cap on in-flight Binance requests across all sync threads
+MAX_CONCURRENT_REQUESTS = 8
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# How long the exchangeInfo symbol list is reused before refreshing (seconds)
+EXCHANGE_INFO_TTL = 3600
+_exchange_symbols = None
+_exchange_symbols_at = 0.0
+_exchange_symbols_lock = threading.Lock()
+
+class WeightBudget:
+    """
+    Token bucket tracking Binance's per-minute request weight
+    
+    Callers acquire the weight of a request before sending it; tokens refill
+    continuously at capacity/60 per second. After each response the bucket is
+    re-synced from the X-MBX-USED-WEIGHT-1M header so it follows what the
+    server has actually counted (including other processes on the same IP).
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.refill_per_sec = capacity / 60.0
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_sec)
+        self.updated_at = now
+    
+    def acquire(self, weight: int = 1):
+        """Block until `weight` tokens are available, then take them"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.refill_per_sec
+            time.sleep(wait)
+    
+    def sync_used(self, used_weight: int):
+        """Lower the available tokens to match weight the server reports as used"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, max(0.0, self.capacity - used_weight))
+    
+    def back_off(self, seconds: float):
+        """Hold all callers for `seconds` (e.g. after a 429/418 with Retry-After)"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.refill_per_sec)
+
+
+_weight_budget = WeightBudget(WEIGHT_LIMIT_PER_MINUTE)
+
+
+def _binance_get(path: str, params: Optional[Dict] = None, weight: int = 1,
+                 timeout: int = 30, session: Optional[requests.Session] = None) -> requests.Response:
+    """GET a Binance endpoint within the shared weight budget and concurrency cap"""
+    if session is None:
+        session = get_session()
+    
+    _weight_budget.acquire(weight)
+    with _request_slots:
+        response = session.get(f"{BASE_URL}/{path}", params=params, timeout=timeout)
+    
+    used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+    if used and used.isdigit():
+        _weight_budget.sync_used(int(used))
+    
+    # Rate limited (429) or IP banned (418): stop every thread until Retry-After
+    if response.status_code in (418, 429):
+        retry_after = response.headers.get('Retry-After', '')
+        _weight_budget.back_off(int(retry_after) if retry_after.isdigit() else 60)
+    
+    return response
+
+
+# Shared session so keep-alive connections to Binance are reused across calls
+_session = None
+_session_lock = threading.Lock()
+
 
 def get_session() -> requests.Session:
-    """Create a requests session with proxy if configured"""
+    """Get the shared requests session, creating it (with proxy if configured) on first use"""
+    global _session
+    if _session is not None:
+        return _session
+    
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+    return _session
+
+
+def _create_session() -> requests.Session:
+    """Create a pooled requests session with retries and proxy if configured"""
     session = requests.Session()
+    # Advertise every encoding urllib3 can decode here (gzip/deflate, plus br
+    # when brotli is installed); kline pages shrink several-fold on the wire
+    session.headers.update({
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'User-Agent': 'binance-watcher/1.0'
+    })
+    
+    retries = Retry(total=3, backoff_factor=0.2,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
     
     proxy_url = config.get_proxy_url()
     if proxy_url:
@@ -71,21 +201,31 @@ def fetch_klines(symbol: str = "BTCUSDT", interval: str = "1d",
     if end_time:
         params["endTime"] = end_time
     
-    if session is None:
-        session = get_session()
-    
     try:
-        response = session.get(f"{BASE_URL}/klines", params=params, timeout=30)
+        response = _binance_get("klines", params=params, weight=KLINES_WEIGHT, session=session)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         print(f"Error fetching klines for {symbol}: {e}")
         return []
 
 
-def parse_kline(candle: List, coin: str, symbol: str) -> Dict:
+# Field order of the tuples built by parse_klines_rows (matches database.VOLUME_COLUMNS)
+KLINE_ROW_FIELDS = (
+    'coin', 'symbol', 'date', 'open_price', 'close_price', 'high_price', 'low_price',
+    'total_volume', 'buy_volume', 'sell_volume', 'net_volume',
+    'buy_volume_usd', 'sell_volume_usd', 'net_volume_usd', 'price_change_pct'
+)
+
+
+def parse_klines_rows(klines: List, coin: str, symbol: str) -> List[Tuple]:
     """
-    Parse a single kline candle into a structured dictionary
+    Parse a batch of kline candles at once using NumPy column math
+    
+    Float conversion and the derived buy/sell/net volumes, USD values
+    (at the average of open and close) and price change are computed on
+    whole columns, and each candle becomes a plain tuple in
+    KLINE_ROW_FIELDS order. Dates are the candle's UTC open day.
     
     Binance Kline format:
     [0] Open time (ms)
@@ -100,58 +240,63 @@ def parse_kline(candle: List, coin: str, symbol: str) -> Dict:
     [9] Taker buy base asset volume
     [10] Taker buy quote asset volume
     [11] Ignore
+    
+    Args:
+        klines: Raw kline rows as returned by fetch_klines
+        coin: Base coin name
+        symbol: Trading pair
+    
+    Returns:
+        List of parsed volume data tuples
     """
-    timestamp = candle[0]
-    open_price = float(candle[1])
-    high_price = float(candle[2])
-    low_price = float(candle[3])
-    close_price = float(candle[4])
-    total_volume = float(candle[5])
-    taker_buy_volume = float(candle[9])
-    
-    # Calculate sell volume
-    taker_sell_volume = total_volume - taker_buy_volume
+    if not klines:
+        return []
+    
+    arr = np.asarray(klines, dtype=object)
+    open_price, high_price, low_price, close_price, total_volume = arr[:, 1:6].astype(np.float64).T
+    taker_buy_volume = arr[:, 9].astype(np.float64)
     
-    # Net volume (positive = more buying, negative = more selling)
+    taker_sell_volume = total_volume - taker_buy_volume
     net_volume = taker_buy_volume - taker_sell_volume
     
-    # USD calculations using average price
     avg_price = (open_price + close_price) / 2
-    buy_volume_usd = taker_buy_volume * avg_price
-    sell_volume_usd = taker_sell_volume * avg_price
-    net_volume_usd = net_volume * avg_price
-    
-    # Price change percentage
-    price_change_pct = ((close_price - open_price) / open_price) * 100 if open_price > 0 else 0
-    
-    # Convert timestamp to date string
-    date_str = datetime.utcfromtimestamp(timestamp / 1000).strftime('%Y-%m-%d')
-    
-    return {
-        'coin': coin,  # Base coin (BTC, ETH, etc.)
-        'symbol': symbol,  # Original trading pair
-        'date': date_str,
-        'open_price': open_price,
-        'close_price': close_price,
-        'high_price': high_price,
-        'low_price': low_price,
-        'total_volume': total_volume,
-        'buy_volume': taker_buy_volume,
-        'sell_volume': taker_sell_volume,
-        'net_volume': net_volume,
-        'buy_volume_usd': buy_volume_usd,
-        'sell_volume_usd': sell_volume_usd,
-        'net_volume_usd': net_volume_usd,
-        'price_change_pct': price_change_pct
-    }
+    # ((close - open) / open) * 100, left at 0 where open is not positive
+    price_change_pct = np.divide(close_price - open_price, open_price,
+                                 out=np.zeros_like(open_price), where=open_price > 0) * 100
+    
+    dates = np.datetime_as_string(arr[:, 0].astype('int64').astype('datetime64[ms]'), unit='D')
+    
+    return list(zip(
+        repeat(coin), repeat(symbol), dates.tolist(),
+        open_price.tolist(), close_price.tolist(), high_price.tolist(), low_price.tolist(),
+        total_volume.tolist(), taker_buy_volume.tolist(), taker_sell_volume.tolist(),
+        net_volume.tolist(), (taker_buy_volume * avg_price).tolist(),
+        (taker_sell_volume * avg_price).tolist(), (net_volume * avg_price).tolist(),
+        price_change_pct.tolist()
+    ))
 
 
-def fetch_all_historical_data(symbol: str = "BTCUSDT", coin: str = "BTC",
-                               interval: str = "1d",
-                               start_date: Optional[str] = None,
-                               progress_callback=None) -> List[Dict]:
+def rows_to_dicts(rows: List[Tuple]) -> List[Dict]:
+    """Convert parse_klines_rows tuples into dicts keyed by KLINE_ROW_FIELDS"""
+    return [dict(zip(KLINE_ROW_FIELDS, row)) for row in rows]
+
+
+def parse_klines_batch(klines: List, coin: str, symbol: str) -> List[Dict]:
     """
-    Fetch ALL available historical data from Binance using pagination
+    Parse a batch of kline candles into dictionaries (see parse_klines_rows)
+    
+    Returns:
+        List of parsed volume data dictionaries
+    """
+    return rows_to_dicts(parse_klines_rows(klines, coin, symbol))
+
+
+def iter_historical_batches(symbol: str = "BTCUSDT", coin: str = "BTC",
+                            interval: str = "1d",
+                            start_date: Optional[str] = None,
+                            progress_callback=None) -> Iterator[List[Tuple]]:
+    """
+    Iterate over ALL available historical data from Binance one page at a time
     
     Args:
         symbol: Trading pair
@@ -160,29 +305,33 @@ def fetch_all_historical_data(symbol: str = "BTCUSDT", coin: str = "BTC",
         start_date: Optional start date (YYYY-MM-DD format), defaults to earliest available
         progress_callback: Optional callback function(fetched_count, message)
     
-    Returns:
-        List of parsed volume data dictionaries
+    Yields:
+        Lists of parsed volume data tuples in KLINE_ROW_FIELDS order
+        (up to MAX_CANDLES per batch)
     """
-    all_data = []
     session = get_session()
+    fetched = 0
     
     # Start from the beginning of time if not specified
     # Binance BTC/USDT data starts from 2017-08-17
     if start_date:
-        start_time = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp() * 1000)
+        # Dates are UTC days, same as the candle open times
+        start_time = int(datetime.strptime(start_date, '%Y-%m-%d')
+                         .replace(tzinfo=timezone.utc).timestamp() * 1000)
     else:
         # Default to start of Binance trading (Aug 17, 2017)
         # This ensures we paginate forward through all history
         start_time = int(datetime(2017, 8, 17).timestamp() * 1000)
     
     end_time = int(datetime.now().timestamp() * 1000)
+    interval_ms = INTERVAL_MS.get(interval)
     
     current_start = start_time
     batch_count = 0
     
     while True:
         if progress_callback:
-            progress_callback(len(all_data), f"Fetching {symbol} batch {batch_count + 1}...")
+            progress_callback(fetched, f"Fetching {symbol} batch {batch_count + 1}...")
         
         klines = fetch_klines(
             symbol=symbol,
@@ -197,31 +346,52 @@ def fetch_all_historical_data(symbol: str = "BTCUSDT", coin: str = "BTC",
             break
         
         # Parse all candles
-        for candle in klines:
-            parsed = parse_kline(candle, coin, symbol)
-            all_data.append(parsed)
+        batch = parse_klines_rows(klines, coin, symbol)
+        fetched += len(batch)
+        yield batch
         
         batch_count += 1
+        last_timestamp = klines[-1][0]
         
-        # Check if we got less than max, meaning we've reached the end
+        # Done if we got less than max, or the last candle already covers
+        # end_time (avoids an extra empty request on exact multiples of MAX_CANDLES)
         if len(klines) < MAX_CANDLES:
             break
+        if interval_ms and last_timestamp + interval_ms > end_time:
+            break
+        
+        # Safety check - prevent infinite loops if the cursor stops advancing
+        if last_timestamp < current_start:
+            print(f"Warning: {symbol} pagination did not advance, stopping")
+            break
         
         # Move start time to after the last candle
-        last_timestamp = klines[-1][0]
         current_start = last_timestamp + 1
-        
-        # Rate limiting
-        time.sleep(REQUEST_DELAY)
-        
-        # Safety check - prevent infinite loops
-        if batch_count > 100:  # ~100k candles max
-            print("Warning: Reached maximum batch limit")
-            break
     
     if progress_callback:
-        progress_callback(len(all_data), f"Completed {symbol}! Fetched {len(all_data)} records.")
+        progress_callback(fetched, f"Completed {symbol}! Fetched {fetched} records.")
+
+
+def fetch_all_historical_data(symbol: str = "BTCUSDT", coin: str = "BTC",
+                               interval: str = "1d",
+                               start_date: Optional[str] = None,
+                               progress_callback=None) -> List[Dict]:
+    """
+    Fetch ALL available historical data from Binance using pagination
+    
+    Args:
+        symbol: Trading pair
+        coin: Base coin name (for aggregation)
+        interval: Candlestick interval
+        start_date: Optional start date (YYYY-MM-DD format), defaults to earliest available
+        progress_callback: Optional callback function(fetched_count, message)
     
+    Returns:
+        List of parsed volume data dictionaries
+    """
+    all_data = []
+    for batch in iter_historical_batches(symbol, coin, interval, start_date, progress_callback):
+        all_data.extend(rows_to_dicts(batch))
     return all_data
 
 
@@ -239,7 +409,7 @@ def fetch_recent_data(symbol: str = "BTCUSDT", coin: str = "BTC", days: int = 30
     """
     session = get_session()
     klines = fetch_klines(symbol=symbol, interval="1d", limit=min(days, MAX_CANDLES), session=session)
-    return [parse_kline(candle, coin, symbol) for candle in klines]
+    return parse_klines_batch(klines, coin, symbol)
 
 
 def fetch_coin_data(coin: str, days: Optional[int] = None, 
@@ -257,45 +427,123 @@ def fetch_coin_data(coin: str, days: Optional[int] = None,
     Returns:
         List of combined volume data
     """
-    all_data = []
     pairs = config.get_trading_pairs(coin)
     
-    for symbol in pairs:
+    def fetch_pair(symbol):
         try:
             if days is not None:
-                data = fetch_recent_data(symbol=symbol, coin=coin, days=days)
-            else:
-                data = fetch_all_historical_data(
-                    symbol=symbol, 
-                    coin=coin,
-                    start_date=start_date,
-                    progress_callback=progress_callback
-                )
-            all_data.extend(data)
+                return fetch_recent_data(symbol=symbol, coin=coin, days=days)
+            return fetch_all_historical_data(
+                symbol=symbol, 
+                coin=coin,
+                start_date=start_date,
+                progress_callback=progress_callback
+            )
         except Exception as e:
             print(f"Error fetching {symbol}: {e}")
-            continue
+            return []
+    
+    # Pairs hit the same host independently, so overlap their round-trips
+    all_data = []
+    with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+        for data in executor.map(fetch_pair, pairs):
+            all_data.extend(data)
     
     return all_data
 
 
+def sync_coin_history(coin: str, write_batch: Callable[[List[Tuple]], object],
+                      start_date: Optional[str] = None,
+                      progress_callback=None,
+                      resume_dates: Optional[Dict[str, str]] = None) -> int:
+    """
+    Stream full history for a coin's USDT and USDC pairs into a writer
+    
+    Each page of parsed candles is handed to write_batch as soon as it
+    arrives, so memory stays bounded by one batch per pair instead of the
+    whole history.
+    
+    Args:
+        coin: Base coin (BTC, ETH, etc.)
+        write_batch: Callable receiving each list of parsed row tuples in
+            KLINE_ROW_FIELDS order (e.g. db.upsert_volume_rows)
+        start_date: Start date for historical fetch
+        progress_callback: Progress callback
+        resume_dates: Optional symbol -> latest stored date. Pairs listed here
+            are fetched from that date onwards (re-fetching the possibly still
+            open last candle) instead of from start_date, since closed daily
+            candles never change
+    
+    Returns:
+        Number of records written
+    
+    Raises:
+        Any exception raised by write_batch. A failed fetch only ends that
+        pair's stream, but a failed write aborts the sync so the caller does
+        not treat a partial write as success.
+    """
+    pairs = config.get_trading_pairs(coin)
+    resume_dates = resume_dates or {}
+    
+    def sync_pair(symbol):
+        written = 0
+        batches = iter_historical_batches(
+            symbol=symbol,
+            coin=coin,
+            start_date=resume_dates.get(symbol, start_date),
+            progress_callback=progress_callback
+        )
+        while True:
+            # Only the fetch is guarded; write errors propagate to the caller
+            try:
+                batch = next(batches, None)
+            except Exception as e:
+                print(f"Error fetching {symbol}: {e}")
+                break
+            if batch is None:
+                break
+            write_batch(batch)
+            written += len(batch)
+        return written
+    
+    with ThreadPoolExecutor(max_workers=len(pairs)) as executor:
+        return sum(executor.map(sync_pair, pairs))
+
+
+def get_exchange_symbols() -> Set[str]:
+    """
+    Get every symbol listed on Binance from a single unfiltered exchangeInfo call
+    
+    The result is cached for EXCHANGE_INFO_TTL seconds. If a refresh fails,
+    the previous set is kept (or an empty set returned if there is none yet).
+    """
+    global _exchange_symbols, _exchange_symbols_at
+    
+    with _exchange_symbols_lock:
+        if _exchange_symbols is not None and time.monotonic() - _exchange_symbols_at < EXCHANGE_INFO_TTL:
+            return _exchange_symbols
+        
+        try:
+            response = _binance_get("exchangeInfo", weight=EXCHANGE_INFO_WEIGHT)
+            response.raise_for_status()
+            info = orjson.loads(response.content)
+            _exchange_symbols = {s['symbol'] for s in info.get('symbols', [])}
+            _exchange_symbols_at = time.monotonic()
+        except Exception as e:
+            print(f"Error fetching exchange info: {e}")
+        
+        return _exchange_symbols if _exchange_symbols is not None else set()
+
+
 def check_symbol_exists(symbol: str) -> bool:
     """Check if a trading pair exists on Binance"""
-    session = get_session()
-    try:
-        response = session.get(f"{BASE_URL}/exchangeInfo", params={"symbol": symbol}, timeout=10)
-        return response.status_code == 200
-    except:
-        return False
+    return symbol in get_exchange_symbols()
 
 
 def get_available_pairs_for_coin(coin: str) -> List[str]:
     """Get which pairs (USDT/USDC) are available for a coin"""
-    available = []
-    for symbol in config.get_trading_pairs(coin):
-        if check_symbol_exists(symbol):
-            available.append(symbol)
-    return available
+    symbols = get_exchange_symbols()
+    return [symbol for symbol in config.get_trading_pairs(coin) if symbol in symbols]
 
 
 if __name__ == "__main__":
@@ -5,7 +5,9 @@ Reads settings from config.ini file
 
 import os
 import configparser
-from typing import List, Optional, Dict
+import functools
+import re
+from typing import List, Optional, Dict, Tuple
 
 CONFIG_PATH = os.environ.get('CONFIG_PATH', 'config.ini')
 
@@ -21,9 +23,24 @@ DEFAULTS = {
     'DEBUG': 'false'
 }
 
+# One "KEY = value" line; surrounding whitespace is not part of key or value
+_KEY_VALUE_RE = re.compile(r'^[^\S\n]*(\w+)[^\S\n]*=[^\S\n]*(.*?)\s*$', re.MULTILINE)
+
+# Parsed config, populated on first load_config() call
+_config_cache = None
+
 
 def load_config() -> dict:
-    """Load configuration from config.ini file"""
+    """
+    Load configuration from config.ini file
+    
+    The file is parsed once per process and the resulting dict is reused
+    by every accessor; call invalidate_config() to force a re-read.
+    """
+    global _config_cache
+    if _config_cache is not None:
+        return _config_cache
+    
     config = configparser.ConfigParser()
     
     # Create default config if not exists
@@ -35,24 +52,31 @@ def load_config() -> dict:
     
     try:
         with open(CONFIG_PATH, 'r') as f:
-            for line in f:
-                line = line.strip()
-                # Skip comments and empty lines
-                if not line or line.startswith('#') or line.startswith('['):
-                    continue
-                # Parse key=value pairs
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if key in DEFAULTS:
-                        config_dict[key] = value
+            text = f.read()
+        # Comments, [section] headers and blank lines never match the pattern
+        config_dict.update(
+            (key, value) for key, value in _KEY_VALUE_RE.findall(text)
+            if key in DEFAULTS
+        )
     except Exception as e:
         print(f"Warning: Could not read config file: {e}")
     
+    _config_cache = config_dict
     return config_dict
 
 
+def invalidate_config():
+    """Drop the cached config so the next accessor re-reads config.ini"""
+    global _config_cache
+    _config_cache = None
+    get_coins.cache_clear()
+    get_proxy_url.cache_clear()
+    get_trading_pairs.cache_clear()
+    get_all_trading_pairs.cache_clear()
+    get_etf_mappings.cache_clear()
+    get_etfs_for_coin.cache_clear()
+
+
 def create_default_config():
     """Create default config.ini file"""
     default_content = '''# =============================================================================
@@ -109,15 +133,17 @@ DEBUG = false
         print(f"Warning: Could not create config file: {e}")
 
 
+@functools.lru_cache(maxsize=1)
 def get_coins() -> List[str]:
-    """Get list of coins to track"""
+    """Get list of coins to track (shared cached list - do not mutate)"""
     config = load_config()
     coins_str = config.get('COINS', DEFAULTS['COINS'])
     return [c.strip().upper() for c in coins_str.split(',') if c.strip()]
 
 
+@functools.lru_cache(maxsize=1)
 def get_proxy_url() -> Optional[str]:
-    """Get proxy URL - prioritizes environment variable for security"""
+    """Get proxy URL - prioritizes environment variable for security (cached)"""
     # Priority: Environment variable > config file
     proxy = os.environ.get('PROXY_URL', '').strip()
     if not proxy:
@@ -166,21 +192,21 @@ def is_debug() -> bool:
 
 
 # Convenience function to get all trading pairs for a coin
-def get_trading_pairs(coin: str) -> List[str]:
+@functools.lru_cache(maxsize=128)
+def get_trading_pairs(coin: str) -> Tuple[str, ...]:
     """Get all trading pairs (USDT + USDC) for a coin"""
-    return [f"{coin}USDT", f"{coin}USDC"]
+    return (f"{coin}USDT", f"{coin}USDC")
 
 
-def get_all_trading_pairs() -> List[str]:
+@functools.lru_cache(maxsize=1)
+def get_all_trading_pairs() -> Tuple[str, ...]:
     """Get all trading pairs for all configured coins"""
-    pairs = []
-    for coin in get_coins():
-        pairs.extend(get_trading_pairs(coin))
-    return pairs
+    return tuple(pair for coin in get_coins() for pair in get_trading_pairs(coin))
 
 
-def get_etf_mappings() -> Dict[str, List[str]]:
-    """Get ETF mappings from config (coin -> list of ETF tickers)"""
+@functools.lru_cache(maxsize=1)
+def get_etf_mappings() -> Dict[str, Tuple[str, ...]]:
+    """Get ETF mappings from config (coin -> tuple of ETF tickers, shared cached dict)"""
     config = load_config()
     etf_str = config.get('ETF_VOLUME', DEFAULTS.get('ETF_VOLUME', ''))
     mappings = {}
@@ -189,16 +215,17 @@ def get_etf_mappings() -> Dict[str, List[str]]:
         if '=' in item:
             coin, etfs = item.split('=', 1)
             # Support multiple ETFs separated by pipe
-            etf_list = [e.strip() for e in etfs.split('|') if e.strip()]
+            etf_list = tuple(e.strip() for e in etfs.split('|') if e.strip())
             if etf_list:
                 mappings[coin.strip().upper()] = etf_list
     return mappings
 
 
-def get_etfs_for_coin(coin: str) -> List[str]:
-    """Get list of ETF tickers for a coin, or empty list if not configured"""
+@functools.lru_cache(maxsize=None)
+def get_etfs_for_coin(coin: str) -> Tuple[str, ...]:
+    """Get ETF tickers for a coin (immutable, cached), or an empty tuple if not configured"""
     mappings = get_etf_mappings()
-    return mappings.get(coin.upper(), [])
+    return mappings.get(coin.upper(), ())
 
 
 def get_etf_for_coin(coin: str) -> Optional[str]:
@@ -4,24 +4,143 @@ SQLite-based persistent storage for volume data
 Supports coin aggregation (combining USDT + USDC pairs)
 """
 
+import atexit
+import functools
 import sqlite3
 import os
-from datetime import datetime, date
+import json
+import threading
+import time
+import weakref
+from operator import itemgetter
+from pathlib import Path
+from datetime import datetime, date, timedelta, timezone
 from contextlib import contextmanager
 import config
 
 DATABASE_PATH = config.get_database_path()
 
+# Stored in PRAGMA user_version once init_database() has run; bump it
+# whenever the DDL in init_database() changes so existing databases re-run it
+SCHEMA_VERSION = 2
 
-@contextmanager
-def get_db_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DATABASE_PATH)
+
+# Each thread keeps one open connection instead of reconnecting per query
+_local = threading.local()
+
+
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection that can be weakly referenced (the base type can't)"""
+
+
+# Every open per-thread connection, so they can be closed cleanly at exit;
+# connections of finished threads drop out automatically
+_open_connections = weakref.WeakSet()
+
+
+def _connect(readonly=False):
+    """Open a connection tuned for this workload (optionally read-only)"""
+    # Coins are synced concurrently; let writers wait on the lock instead of
+    # failing fast with "database is locked"
+    # Connections are long-lived, so keep plenty of compiled statements around
+    if readonly:
+        uri = f'{Path(DATABASE_PATH).resolve().as_uri()}?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False,
+                               factory=_Connection, cached_statements=256)
+    else:
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30, check_same_thread=False,
+                               factory=_Connection, cached_statements=256)
+    _open_connections.add(conn)
     conn.row_factory = sqlite3.Row
+    if readonly:
+        conn.execute('PRAGMA query_only=1')
+    # Safe with WAL (set in init_database) and avoids an fsync per commit
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')
+    # Page cache is per connection, so keep it modest (16MB) with many sync threads
+    conn.execute('PRAGMA cache_size=-16384')
+    # Truncate the WAL back to 32MB after checkpoints instead of leaving it at its peak size
+    conn.execute('PRAGMA journal_size_limit=33554432')
+    return conn
+
+
+def close_all_connections():
+    """Close every per-thread connection (the last close checkpoints the WAL)"""
+    for conn in list(_open_connections):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _open_connections.clear()
+
+
+atexit.register(close_all_connections)
+
+
+@contextmanager
+def get_db_connection(readonly=False):
+    """
+    Context manager yielding this thread's persistent database connection
+    
+    Args:
+        readonly: Use the thread's separate read-only (mode=ro, query_only)
+            connection; for functions that only SELECT
+    """
+    slot = 'ro_conn' if readonly else 'conn'
+    conn, path = getattr(_local, slot, (None, None))
+    # Reconnect if the path changed or close_all_connections() closed it
+    if conn is None or conn not in _open_connections or path != DATABASE_PATH:
+        conn = _connect(readonly)
+        setattr(_local, slot, (conn, DATABASE_PATH))
+    
     try:
         yield conn
     finally:
-        conn.close()
+        # Discard anything left uncommitted, as closing a connection would
+        if conn.in_transaction:
+            conn.rollback()
+
+
+# Extra BEGIN IMMEDIATE attempts when the write lock is still busy after the
+# connection's 30s busy timeout
+WRITE_LOCK_RETRIES = 3
+
+
+@contextmanager
+def write_transaction():
+    """
+    Context manager yielding this thread's connection inside a write transaction
+    
+    The transaction is opened with BEGIN IMMEDIATE so the write lock is taken
+    up front (waiting on the busy timeout) rather than when a deferred
+    transaction first writes, where a concurrent writer makes it fail with
+    "database is locked". Committed on success, rolled back on error.
+    """
+    with get_db_connection() as conn:
+        for attempt in range(WRITE_LOCK_RETRIES + 1):
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                break
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or attempt == WRITE_LOCK_RETRIES:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+        
+        yield conn
+        conn.commit()
+
+
+# Secondary indexes of volume_data_raw, dropped and rebuilt around bulk loads
+# (the (symbol, date) key backs the upsert and always stays)
+RAW_INDEXES = {
+    'idx_raw_coin_date_cover': '''
+        CREATE INDEX IF NOT EXISTS idx_raw_coin_date_cover
+        ON volume_data_raw(coin, date DESC, open_price, close_price, high_price, low_price,
+                           total_volume, buy_volume, sell_volume, net_volume,
+                           buy_volume_usd, sell_volume_usd, net_volume_usd, price_change_pct)
+    ''',
+}
 
 
 def init_database():
@@ -29,10 +148,22 @@ def init_database():
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
-        # Raw volume data table (per trading pair)
+        # Schema already up to date: skip the CREATE ... IF NOT EXISTS round trips
+        if cursor.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
+        # Lets delete_old_alerts() shrink the file; only takes effect on a new
+        # (still empty) database, existing ones would need a full VACUUM
+        cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        
+        # WAL lets readers run alongside the sync writers (persists in the DB file)
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
+        # Raw volume data table (per trading pair). Clustered on its natural
+        # key, so rows are stored once in (symbol, date) order with no rowid,
+        # surrogate id or created_at stamp
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS volume_data_raw (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
                 coin TEXT NOT NULL,
                 symbol TEXT NOT NULL,
                 date DATE NOT NULL,
@@ -48,39 +179,70 @@ def init_database():
                 sell_volume_usd REAL,
                 net_volume_usd REAL,
                 price_change_pct REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(symbol, date)
-            )
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
         ''')
         
-        # Index for faster queries
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_raw_coin_date 
-            ON volume_data_raw(coin, date DESC)
-        ''')
+        # Covering index for the per-coin aggregation (daily table refresh and
+        # the all-data summary): every column they read is in the index, so
+        # GROUP BY date is an index-only ordered scan (it also replaces the
+        # old plain (coin, date) index)
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_raw_coin_date_cover'"
+        )
+        created_cover_index = cursor.fetchone() is None
+        cursor.execute(RAW_INDEXES['idx_raw_coin_date_cover'])
+        cursor.execute('DROP INDEX IF EXISTS idx_raw_coin_date')
+        
+        # Duplicated the UNIQUE/PRIMARY KEY (symbol, date) index
+        cursor.execute('DROP INDEX IF EXISTS idx_raw_symbol_date')
         
+        # Per-coin daily aggregate of volume_data_raw (all pairs combined),
+        # kept current by upsert_volume_rows() so reads skip the GROUP BY.
+        # Tables with a natural key are WITHOUT ROWID; tables that already
+        # exist in older databases keep their rowid layout, nothing is rebuilt
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'volume_data_daily'"
+        )
+        created_daily_table = cursor.fetchone() is None
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_raw_symbol_date 
-            ON volume_data_raw(symbol, date DESC)
+            CREATE TABLE IF NOT EXISTS volume_data_daily (
+                coin TEXT NOT NULL,
+                date DATE NOT NULL,
+                open_price REAL,
+                close_price REAL,
+                high_price REAL,
+                low_price REAL,
+                total_volume REAL,
+                buy_volume REAL,
+                sell_volume REAL,
+                net_volume REAL,
+                buy_volume_usd REAL,
+                sell_volume_usd REAL,
+                net_volume_usd REAL,
+                price_change_pct REAL,
+                PRIMARY KEY (coin, date)
+            ) WITHOUT ROWID
         ''')
+        if created_daily_table:
+            # Backfill from the raw rows already in an existing database
+            cursor.execute(f'{_DAILY_AGGREGATE_SELECT} WHERE true GROUP BY coin, date')
         
         # Sync status table to track last sync
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sync_status (
-                id INTEGER PRIMARY KEY,
-                coin TEXT UNIQUE NOT NULL,
+                coin TEXT NOT NULL PRIMARY KEY,
                 last_sync_date DATE,
                 last_sync_timestamp TIMESTAMP,
                 total_records INTEGER DEFAULT 0,
                 earliest_date DATE,
                 latest_date DATE
-            )
+            ) WITHOUT ROWID
         ''')
         
-        # ETF volume data table
+        # ETF volume data table (clustered on (ticker, date) like volume_data_raw)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS etf_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
                 coin TEXT NOT NULL,
                 ticker TEXT NOT NULL,
                 date DATE NOT NULL,
@@ -96,9 +258,8 @@ def init_database():
                 sell_volume_usd REAL,
                 net_volume_usd REAL,
                 price_change_pct REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(ticker, date)
-            )
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID
         ''')
         
         # Index for ETF queries
@@ -107,10 +268,8 @@ def init_database():
             ON etf_data(coin, date DESC)
         ''')
         
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_etf_ticker_date 
-            ON etf_data(ticker, date DESC)
-        ''')
+        # Duplicated the UNIQUE/PRIMARY KEY (ticker, date) index
+        cursor.execute('DROP INDEX IF EXISTS idx_etf_ticker_date')
         
         # Smart alerts table for whale detection and unusual activity
         cursor.execute('''
@@ -127,7 +286,7 @@ def init_database():
                 zscore REAL,
                 size_class TEXT,
                 rsi REAL,
-                metadata TEXT,
+                metadata BLOB,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 acknowledged INTEGER DEFAULT 0,
                 UNIQUE(coin, date, alert_type)
@@ -153,7 +312,6 @@ def init_database():
         # Futures metrics table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS futures_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
                 coin TEXT NOT NULL,
                 symbol TEXT NOT NULL,
                 date DATE NOT NULL,
@@ -164,8 +322,8 @@ def init_database():
                 funding_rate_annualized REAL,
                 open_interest REAL,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(symbol, date)
-            )
+                PRIMARY KEY (symbol, date)
+            ) WITHOUT ROWID
         ''')
         
         cursor.execute('''
@@ -173,7 +331,104 @@ def init_database():
             ON futures_metrics(coin, date DESC)
         ''')
         
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        
         conn.commit()
+        
+        # Give the planner statistics for the new index
+        if created_cover_index:
+            cursor.execute('ANALYZE')
+            conn.commit()
+
+
+# Column order of rows passed to upsert_volume_rows
+VOLUME_COLUMNS = (
+    'coin', 'symbol', 'date', 'open_price', 'close_price', 'high_price', 'low_price',
+    'total_volume', 'buy_volume', 'sell_volume', 'net_volume',
+    'buy_volume_usd', 'sell_volume_usd', 'net_volume_usd', 'price_change_pct'
+)
+
+_get_volume_row = itemgetter(*VOLUME_COLUMNS)
+
+UPSERT_VOLUME_SQL = '''
+    INSERT INTO volume_data_raw (
+        coin, symbol, date, open_price, close_price, high_price, low_price,
+        total_volume, buy_volume, sell_volume, net_volume,
+        buy_volume_usd, sell_volume_usd, net_volume_usd, price_change_pct
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(symbol, date) DO UPDATE SET
+        open_price = excluded.open_price,
+        close_price = excluded.close_price,
+        high_price = excluded.high_price,
+        low_price = excluded.low_price,
+        total_volume = excluded.total_volume,
+        buy_volume = excluded.buy_volume,
+        sell_volume = excluded.sell_volume,
+        net_volume = excluded.net_volume,
+        buy_volume_usd = excluded.buy_volume_usd,
+        sell_volume_usd = excluded.sell_volume_usd,
+        net_volume_usd = excluded.net_volume_usd,
+        price_change_pct = excluded.price_change_pct
+'''
+
+_DAILY_AGGREGATE_SELECT = '''
+    INSERT INTO volume_data_daily (
+        coin, date, open_price, close_price, high_price, low_price,
+        total_volume, buy_volume, sell_volume, net_volume,
+        buy_volume_usd, sell_volume_usd, net_volume_usd, price_change_pct
+    )
+    SELECT 
+        coin,
+        date,
+        AVG(open_price),
+        AVG(close_price),
+        MAX(high_price),
+        MIN(low_price),
+        SUM(total_volume),
+        SUM(buy_volume),
+        SUM(sell_volume),
+        SUM(net_volume),
+        SUM(buy_volume_usd),
+        SUM(sell_volume_usd),
+        SUM(net_volume_usd),
+        AVG(price_change_pct)
+    FROM volume_data_raw
+'''
+
+# Re-aggregates one coin's date range; rows written in a batch are
+# contiguous per pair, so one range per coin covers every touched day
+REFRESH_DAILY_SQL = _DAILY_AGGREGATE_SELECT + '''
+    WHERE coin = ? AND date BETWEEN ? AND ?
+    GROUP BY coin, date
+    ON CONFLICT(coin, date) DO UPDATE SET
+        open_price = excluded.open_price,
+        close_price = excluded.close_price,
+        high_price = excluded.high_price,
+        low_price = excluded.low_price,
+        total_volume = excluded.total_volume,
+        buy_volume = excluded.buy_volume,
+        sell_volume = excluded.sell_volume,
+        net_volume = excluded.net_volume,
+        buy_volume_usd = excluded.buy_volume_usd,
+        sell_volume_usd = excluded.sell_volume_usd,
+        net_volume_usd = excluded.net_volume_usd,
+        price_change_pct = excluded.price_change_pct
+'''
+
+
+def _touched_date_ranges(rows):
+    """Return (coin, first_date, last_date) for every coin in a batch of rows"""
+    ranges = {}
+    for row in rows:
+        coin, date_str = row[0], row[2]
+        bounds = ranges.get(coin)
+        if bounds is None:
+            ranges[coin] = [date_str, date_str]
+        elif date_str < bounds[0]:
+            bounds[0] = date_str
+        elif date_str > bounds[1]:
+            bounds[1] = date_str
+    return [(coin, first, last) for coin, (first, last) in ranges.items()]
 
 
 def upsert_volume_data(data_list):
@@ -189,39 +444,174 @@ def upsert_volume_data(data_list):
     if not data_list:
         return 0
     
-    with get_db_connection() as conn:
+    return upsert_volume_rows(map(_get_volume_row, data_list))
+
+
+def upsert_volume_rows(rows):
+    """
+    Insert or update raw volume data given as tuples in VOLUME_COLUMNS order
+    
+    Args:
+        rows: Iterable of volume data tuples
+    
+    Returns:
+        Number of records inserted/updated
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    
+    with write_transaction() as conn:
         cursor = conn.cursor()
+        cursor.executemany(UPSERT_VOLUME_SQL, rows)
+        count = max(cursor.rowcount, 0)
         
-        cursor.executemany('''
-            INSERT INTO volume_data_raw (
-                coin, symbol, date, open_price, close_price, high_price, low_price,
-                total_volume, buy_volume, sell_volume, net_volume,
-                buy_volume_usd, sell_volume_usd, net_volume_usd, price_change_pct
-            ) VALUES (
-                :coin, :symbol, :date, :open_price, :close_price, :high_price, :low_price,
-                :total_volume, :buy_volume, :sell_volume, :net_volume,
-                :buy_volume_usd, :sell_volume_usd, :net_volume_usd, :price_change_pct
-            )
-            ON CONFLICT(symbol, date) DO UPDATE SET
-                open_price = excluded.open_price,
-                close_price = excluded.close_price,
-                high_price = excluded.high_price,
-                low_price = excluded.low_price,
-                total_volume = excluded.total_volume,
-                buy_volume = excluded.buy_volume,
-                sell_volume = excluded.sell_volume,
-                net_volume = excluded.net_volume,
-                buy_volume_usd = excluded.buy_volume_usd,
-                sell_volume_usd = excluded.sell_volume_usd,
-                net_volume_usd = excluded.net_volume_usd,
-                price_change_pct = excluded.price_change_pct
-        ''', data_list)
+        # Same transaction, so readers never see raw and daily out of step
+        cursor.executemany(REFRESH_DAILY_SQL, _touched_date_ranges(rows))
+    
+    return count
+
+
+# Smaller loads go through upsert_volume_rows(); rebuilding the indexes only
+# pays off when many rows are written at once
+BULK_LOAD_MIN_ROWS = 10000
+
+
+def bulk_load_volume_rows(rows):
+    """
+    Load a large batch of raw volume rows (e.g. the initial history backfill)
+    
+    The secondary indexes are dropped, the rows written in (symbol, date)
+    order and the indexes rebuilt in one sorted pass, all in one transaction
+    so readers keep seeing the old indexed state until it commits.
+    
+    Args:
+        rows: Iterable of volume data tuples in VOLUME_COLUMNS order
+    
+    Returns:
+        Number of records inserted/updated
+    """
+    rows = list(rows)
+    if len(rows) < BULK_LOAD_MIN_ROWS:
+        return upsert_volume_rows(rows)
+    
+    rows.sort(key=itemgetter(1, 2))
+    
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        for name in RAW_INDEXES:
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
         
-        conn.commit()
-        return cursor.rowcount
+        cursor.executemany(UPSERT_VOLUME_SQL, rows)
+        count = max(cursor.rowcount, 0)
+        
+        for create_index in RAW_INDEXES.values():
+            cursor.execute(create_index)
+        
+        # Refresh the daily table once the covering index is back
+        cursor.executemany(REFRESH_DAILY_SQL, _touched_date_ranges(rows))
+        cursor.execute('ANALYZE volume_data_raw')
+    
+    return count
 
 
-def get_volume_data(coin='BTC', start_date=None, end_date=None, limit=None):
+def bulk_load_volume_data(data_list):
+    """
+    Dictionary variant of bulk_load_volume_rows()
+    
+    Args:
+        data_list: List of dictionaries with volume data
+    
+    Returns:
+        Number of records inserted/updated
+    """
+    return bulk_load_volume_rows(map(_get_volume_row, data_list))
+
+
+@functools.lru_cache(maxsize=256)
+def _filtered_sql(select, conditions, tail=''):
+    """
+    Build `select WHERE <conditions> tail` once per combination of filters
+    
+    Callers pass only the conditions of the filters actually given, so each
+    combination maps to one fixed SQL string (and one cached statement).
+    
+    Args:
+        select: SELECT ... FROM ... part of the query
+        conditions: Tuple of conditions to AND together, e.g. ('coin = ?',)
+        tail: ORDER BY / LIMIT clause
+    """
+    where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+    return select + where + tail
+
+
+def _present(conditions, values):
+    """Pair conditions with their values, keeping only the filters that were given"""
+    present = [(condition, value) for condition, value in zip(conditions, values) if value]
+    return tuple(c for c, _ in present), [v for _, v in present]
+
+
+def _fetch_columns(cursor):
+    """
+    Fetch an executed query as {column: [values]} instead of one dict per row
+    
+    The cursor must have row_factory = None so rows come back as plain tuples.
+    """
+    names = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return {name: [] for name in names}
+    return dict(zip(names, map(list, zip(*rows))))
+
+
+VOLUME_SELECT = '''
+    SELECT 
+        coin,
+        date,
+        open_price,
+        close_price,
+        high_price,
+        low_price,
+        total_volume,
+        buy_volume,
+        sell_volume,
+        net_volume,
+        buy_volume_usd,
+        sell_volume_usd,
+        net_volume_usd,
+        price_change_pct
+    FROM volume_data_daily
+'''
+
+# Optional date filters of the per-coin queries, in parameter order
+DATE_FILTERS = ('date >= ?', 'date <= ?', 'date < ?')
+
+
+@functools.lru_cache(maxsize=64)
+def _volume_query_sql(conditions, has_limit, order):
+    """Fixed SQL for one combination of _build_volume_query() options"""
+    query = _filtered_sql(VOLUME_SELECT, conditions,
+                          ' ORDER BY date DESC LIMIT ?' if has_limit else ' ORDER BY date DESC')
+    if order == 'asc':
+        # Re-order outside the LIMIT so we still get the most recent rows
+        query = f'SELECT * FROM ({query}) ORDER BY date ASC'
+    return query
+
+
+def _build_volume_query(coin, start_date=None, end_date=None, limit=None, order='desc',
+                        before_date=None):
+    """Build the aggregated (all pairs per coin) volume query and its params"""
+    conditions, params = _present(DATE_FILTERS, (start_date, end_date, before_date))
+    params.insert(0, coin)
+    if limit:
+        params.append(limit)
+    
+    query = _volume_query_sql(('coin = ?',) + conditions, bool(limit), order)
+    return query, params
+
+
+def get_volume_data(coin='BTC', start_date=None, end_date=None, limit=None, order='desc',
+                    before_date=None, columnar=False):
     """
     Retrieve AGGREGATED volume data for a coin (combining all pairs)
     
@@ -229,48 +619,22 @@ def get_volume_data(coin='BTC', start_date=None, end_date=None, limit=None):
         coin: Base coin (BTC, ETH, etc.)
         start_date: Start date filter (inclusive)
         end_date: End date filter (inclusive)
-        limit: Maximum number of records
+        limit: Maximum number of records (most recent dates)
+        order: 'desc' (newest first) or 'asc' (oldest first)
+        before_date: Pagination cursor, only dates before it (exclusive)
+        columnar: Return {column: [values]} instead of a list of row dicts
     
     Returns:
         List of aggregated volume data dictionaries
     """
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        query = '''
-            SELECT 
-                coin,
-                date,
-                AVG(open_price) as open_price,
-                AVG(close_price) as close_price,
-                MAX(high_price) as high_price,
-                MIN(low_price) as low_price,
-                SUM(total_volume) as total_volume,
-                SUM(buy_volume) as buy_volume,
-                SUM(sell_volume) as sell_volume,
-                SUM(net_volume) as net_volume,
-                SUM(buy_volume_usd) as buy_volume_usd,
-                SUM(sell_volume_usd) as sell_volume_usd,
-                SUM(net_volume_usd) as net_volume_usd,
-                AVG(price_change_pct) as price_change_pct
-            FROM volume_data_raw 
-            WHERE coin = ?
-        '''
-        params = [coin]
-        
-        if start_date:
-            query += ' AND date >= ?'
-            params.append(start_date)
-        
-        if end_date:
-            query += ' AND date <= ?'
-            params.append(end_date)
-        
-        query += ' GROUP BY coin, date ORDER BY date DESC'
-        
-        if limit:
-            query += ' LIMIT ?'
-            params.append(limit)
+        query, params = _build_volume_query(coin, start_date, end_date, limit, order, before_date)
+        if columnar:
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            return _fetch_columns(cursor)
         
         cursor.execute(query, params)
         rows = cursor.fetchall()
@@ -278,6 +642,56 @@ def get_volume_data(coin='BTC', start_date=None, end_date=None, limit=None):
         return [dict(row) for row in rows]
 
 
+def iter_volume_data(coin='BTC', start_date=None, end_date=None, limit=None):
+    """
+    Iterate AGGREGATED volume data for a coin without materializing the result
+    
+    Same filters and ordering as get_volume_data(), but rows are yielded one
+    at a time straight from the cursor (used for streaming exports).
+    
+    Yields:
+        Aggregated volume data dictionaries
+    """
+    with get_db_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        
+        query, params = _build_volume_query(coin, start_date, end_date, limit)
+        cursor.execute(query, params)
+        
+        for row in cursor:
+            yield dict(row)
+
+
+# Summary over the rows of {source}; the daily averages divide by the number
+# of distinct days (NULL when there are none)
+_VOLUME_SUMMARY_SQL = '''
+    SELECT
+        COUNT(DISTINCT date) as total_days,
+        SUM(buy_volume) as total_buy_volume,
+        SUM(sell_volume) as total_sell_volume,
+        SUM(net_volume) as total_net_volume,
+        SUM(buy_volume_usd) as total_buy_usd,
+        SUM(sell_volume_usd) as total_sell_usd,
+        SUM(net_volume_usd) as total_net_usd,
+        AVG(close_price) as avg_price,
+        SUM(net_volume) * 1.0 / NULLIF(COUNT(DISTINCT date), 0) as avg_daily_net_volume,
+        SUM(net_volume_usd) * 1.0 / NULLIF(COUNT(DISTINCT date), 0) as avg_daily_net_usd
+    FROM {source}
+'''
+
+# Most recent N days of the daily table
+SQL_VOLUME_SUMMARY_DAYS = _VOLUME_SUMMARY_SQL.format(source='''(
+        SELECT *
+        FROM volume_data_daily
+        WHERE coin = ?
+        ORDER BY date DESC
+        LIMIT ?
+    )''')
+
+# All data; avg_price here is over every raw pair row, not per day
+SQL_VOLUME_SUMMARY_ALL = _VOLUME_SUMMARY_SQL.format(source='volume_data_raw WHERE coin = ?')
+
+
 def get_volume_summary(coin='BTC', days=None):
     """
     Get aggregated volume statistics for a coin
@@ -289,72 +703,31 @@ def get_volume_summary(coin='BTC', days=None):
     Returns:
         Dictionary with summary statistics
     """
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Build query for aggregated data
+    with get_db_connection(readonly=True) as conn:
         if days:
-            query = '''
-                SELECT
-                    COUNT(DISTINCT date) as total_days,
-                    SUM(buy_volume) as total_buy_volume,
-                    SUM(sell_volume) as total_sell_volume,
-                    SUM(net_volume) as total_net_volume,
-                    SUM(buy_volume_usd) as total_buy_usd,
-                    SUM(sell_volume_usd) as total_sell_usd,
-                    SUM(net_volume_usd) as total_net_usd,
-                    AVG(close_price) as avg_price
-                FROM (
-                    SELECT 
-                        date,
-                        SUM(buy_volume) as buy_volume,
-                        SUM(sell_volume) as sell_volume,
-                        SUM(net_volume) as net_volume,
-                        SUM(buy_volume_usd) as buy_volume_usd,
-                        SUM(sell_volume_usd) as sell_volume_usd,
-                        SUM(net_volume_usd) as net_volume_usd,
-                        AVG(close_price) as close_price
-                    FROM volume_data_raw
-                    WHERE coin = ?
-                    GROUP BY date
-                    ORDER BY date DESC
-                    LIMIT ?
-                )
-            '''
-            cursor.execute(query, (coin, days))
+            row = conn.execute(SQL_VOLUME_SUMMARY_DAYS, (coin, days)).fetchone()
         else:
-            query = '''
-                SELECT
-                    COUNT(DISTINCT date) as total_days,
-                    SUM(buy_volume) as total_buy_volume,
-                    SUM(sell_volume) as total_sell_volume,
-                    SUM(net_volume) as total_net_volume,
-                    SUM(buy_volume_usd) as total_buy_usd,
-                    SUM(sell_volume_usd) as total_sell_usd,
-                    SUM(net_volume_usd) as total_net_usd,
-                    AVG(close_price) as avg_price
-                FROM volume_data_raw
-                WHERE coin = ?
-            '''
-            cursor.execute(query, (coin,))
+            row = conn.execute(SQL_VOLUME_SUMMARY_ALL, (coin,)).fetchone()
         
-        row = cursor.fetchone()
-        
-        if row:
-            summary = dict(row)
-            # Calculate averages
-            if summary['total_days'] and summary['total_days'] > 0:
-                summary['avg_daily_net_volume'] = summary['total_net_volume'] / summary['total_days']
-                summary['avg_daily_net_usd'] = summary['total_net_usd'] / summary['total_days']
-            return summary
-        return None
+        return dict(row) if row else None
 
 
-def get_cumulative_volume(coin='BTC', start_date=None):
+def get_cumulative_volume(coin='BTC', start_date=None, after_date=None, limit=None,
+                          columnar=False):
     """
     Calculate cumulative net volume over time for a coin
+    
+    Running totals always start at start_date; after_date and limit only
+    select which page of that series is returned.
+    
+    Args:
+        coin: Base coin
+        start_date: Start date of the running totals (inclusive)
+        after_date: Pagination cursor, only dates after it (exclusive)
+        limit: Maximum number of records
+        columnar: Return {column: [values]} instead of a list of row dicts
     """
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
         query = '''
@@ -364,13 +737,8 @@ def get_cumulative_volume(coin='BTC', start_date=None):
                 net_volume_usd,
                 SUM(net_volume) OVER (ORDER BY date) as cumulative_volume,
                 SUM(net_volume_usd) OVER (ORDER BY date) as cumulative_usd
-            FROM (
-                SELECT 
-                    date,
-                    SUM(net_volume) as net_volume,
-                    SUM(net_volume_usd) as net_volume_usd
-                FROM volume_data_raw
-                WHERE coin = ?
+            FROM volume_data_daily
+            WHERE coin = ?
         '''
         params = [coin]
         
@@ -378,11 +746,22 @@ def get_cumulative_volume(coin='BTC', start_date=None):
             query += ' AND date >= ?'
             params.append(start_date)
         
-        query += '''
-                GROUP BY date
-            )
-            ORDER BY date
-        '''
+        # Page outside the window functions so totals are not reset
+        query = f'SELECT * FROM ({query})'
+        if after_date:
+            query += ' WHERE date > ?'
+            params.append(after_date)
+        
+        query += ' ORDER BY date'
+        
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        if columnar:
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            return _fetch_columns(cursor)
         
         cursor.execute(query, params)
         rows = cursor.fetchall()
@@ -390,15 +769,29 @@ def get_cumulative_volume(coin='BTC', start_date=None):
         return [dict(row) for row in rows]
 
 
+# Fixed SQL for the small per-coin lookups; with per-thread connections the
+# sqlite3 statement cache keeps these compiled between calls
+SQL_SYNC_STATUS = 'SELECT * FROM sync_status WHERE coin = ?'
+
+SQL_DATE_RANGE = '''
+    SELECT MIN(date) as earliest, MAX(date) as latest, COUNT(*) as count
+    FROM volume_data_daily WHERE coin = ?
+'''
+
+SQL_LATEST_DATE = 'SELECT MAX(date) as latest FROM volume_data_raw WHERE coin = ?'
+
+SQL_ETF_DATE_RANGE = '''
+    SELECT MIN(date) as earliest, MAX(date) as latest, COUNT(*) as count
+    FROM etf_data WHERE coin = ?
+'''
+
+SQL_ETF_LATEST_DATE = 'SELECT MAX(date) as latest FROM etf_data WHERE coin = ?'
+
+
 def get_sync_status(coin='BTC'):
     """Get last sync status for a coin"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT * FROM sync_status WHERE coin = ?',
-            (coin,)
-        )
-        row = cursor.fetchone()
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(SQL_SYNC_STATUS, (coin,)).fetchone()
         return dict(row) if row else None
 
 
@@ -408,10 +801,7 @@ def update_sync_status(coin):
         cursor = conn.cursor()
         
         # Get date range and count
-        cursor.execute('''
-            SELECT MIN(date) as earliest, MAX(date) as latest, COUNT(DISTINCT date) as count
-            FROM volume_data_raw WHERE coin = ?
-        ''', (coin,))
+        cursor.execute(SQL_DATE_RANGE, (coin,))
         stats = cursor.fetchone()
         
         cursor.execute('''
@@ -432,62 +822,134 @@ def update_sync_status(coin):
             stats['latest']
         ))
         conn.commit()
+        
+        checkpoint_wal(conn)
+    
+    invalidate_sync_status_cache()
+
+
+# update_sync_status() runs after every sync; it checkpoints the WAL each time
+# and also truncates the WAL file at most once per interval
+WAL_TRUNCATE_INTERVAL = 3600
+
+_last_wal_truncate = time.monotonic()
+
+
+def checkpoint_wal(conn):
+    """
+    Copy committed WAL frames back into the database file
+    
+    Uses a PASSIVE checkpoint (never waits on readers or writers), or a
+    TRUNCATE checkpoint that also resets the -wal file to zero bytes once
+    WAL_TRUNCATE_INTERVAL seconds have passed since the last one.
+    """
+    global _last_wal_truncate
+    
+    now = time.monotonic()
+    if now - _last_wal_truncate >= WAL_TRUNCATE_INTERVAL:
+        _last_wal_truncate = now
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    else:
+        conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchone()
+
+
+# get_all_coins() and get_date_range() run on every dashboard load and are
+# served from a snapshot of sync_status. update_sync_status() drops this
+# process's snapshot at once; other worker processes re-read within the TTL.
+SYNC_STATUS_CACHE_TTL = 30
+
+_sync_status_snapshot = (0.0, None)
+
+
+def _get_sync_status_snapshot():
+    """All sync_status rows keyed by coin, re-read at most every SYNC_STATUS_CACHE_TTL seconds"""
+    global _sync_status_snapshot
+    
+    loaded_at, statuses = _sync_status_snapshot
+    if statuses is None or time.monotonic() - loaded_at > SYNC_STATUS_CACHE_TTL:
+        with get_db_connection(readonly=True) as conn:
+            statuses = {row['coin']: dict(row) for row in conn.execute('SELECT * FROM sync_status')}
+        _sync_status_snapshot = (time.monotonic(), statuses)
+    return statuses
+
+
+def invalidate_sync_status_cache():
+    """Make the next get_all_coins()/get_date_range() call re-read sync_status"""
+    global _sync_status_snapshot
+    _sync_status_snapshot = (0.0, None)
 
 
 def get_all_coins():
     """Get list of all tracked coins"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT DISTINCT coin FROM volume_data_raw ORDER BY coin')
-        return [row[0] for row in cursor.fetchall()]
+    statuses = _get_sync_status_snapshot()
+    return sorted(coin for coin, status in statuses.items() if status['total_records'])
 
 
 def get_date_range(coin='BTC'):
-    """Get the date range of available data for a coin"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT MIN(date) as earliest, MAX(date) as latest, COUNT(DISTINCT date) as count
-            FROM volume_data_raw WHERE coin = ?
-        ''', (coin,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+    """Get the date range of available data for a coin (as of its last sync)"""
+    return date_range_from_status(_get_sync_status_snapshot().get(coin))
+
+
+def date_range_from_status(status):
+    """
+    Date range of a coin's data from its sync_status row
+    
+    For callers that already read the row themselves, e.g. to keep the date
+    range consistent with the last_sync_timestamp they versioned a response on
+    rather than taking it from the possibly older get_date_range() snapshot.
+    
+    Args:
+        status: sync_status row as returned by get_sync_status(), or None
+    
+    Returns:
+        Dict with earliest, latest and count
+    """
+    if not status:
+        return {'earliest': None, 'latest': None, 'count': 0}
+    return {
+        'earliest': status['earliest_date'],
+        'latest': status['latest_date'],
+        'count': status['total_records']
+    }
 
 
 def get_latest_date(coin='BTC') -> str:
     """Get the most recent date we have data for"""
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(SQL_LATEST_DATE, (coin,)).fetchone()
+        return row['latest'] if row and row['latest'] else None
+
+
+def get_latest_dates_by_symbol(coin='BTC') -> dict:
+    """Get the most recent stored date for each trading pair of a coin"""
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT MAX(date) as latest FROM volume_data_raw WHERE coin = ?
+            SELECT symbol, MAX(date) as latest FROM volume_data_raw
+            WHERE coin = ? GROUP BY symbol
         ''', (coin,))
-        row = cursor.fetchone()
-        return row['latest'] if row and row['latest'] else None
+        return {row['symbol']: row['latest'] for row in cursor.fetchall()}
 
 
 def get_missing_dates(coin='BTC', start_date='2017-08-17') -> list:
     """Get list of dates missing from our data"""
-    # This is useful for incremental sync
-    with get_db_connection() as conn:
+    # This is useful for incremental sync. The calendar is generated and
+    # diffed inside SQLite so only the missing dates come back to Python
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT DISTINCT date FROM volume_data_raw 
-            WHERE coin = ? AND date >= ?
-            ORDER BY date
-        ''', (coin, start_date))
-        existing = set(row[0] for row in cursor.fetchall())
-    
-    # Generate all dates
-    from datetime import datetime, timedelta
-    start = datetime.strptime(start_date, '%Y-%m-%d')
-    end = datetime.now()
-    all_dates = set()
-    current = start
-    while current <= end:
-        all_dates.add(current.strftime('%Y-%m-%d'))
-        current += timedelta(days=1)
-    
-    return sorted(all_dates - existing)
+            WITH RECURSIVE all_dates(d) AS (
+                SELECT date(?)
+                UNION ALL
+                SELECT date(d, '+1 day') FROM all_dates
+                WHERE d < date('now', 'localtime')
+            )
+            SELECT d FROM all_dates
+            EXCEPT
+            SELECT date FROM volume_data_raw WHERE coin = ? AND date >= ?
+            ORDER BY d
+        ''', (start_date, coin, start_date))
+        return [row[0] for row in cursor.fetchall()]
 
 
 # =============================================================================
@@ -507,7 +969,7 @@ def upsert_etf_data(data_list):
     if not data_list:
         return 0
     
-    with get_db_connection() as conn:
+    with write_transaction() as conn:
         cursor = conn.cursor()
         
         cursor.executemany('''
@@ -534,12 +996,21 @@ def upsert_etf_data(data_list):
                 net_volume_usd = excluded.net_volume_usd,
                 price_change_pct = excluded.price_change_pct
         ''', data_list)
-        
-        conn.commit()
-        return cursor.rowcount
+    
+    return cursor.rowcount
+
+
+# Columns returned by get_etf_data (id/created_at are bookkeeping only)
+ETF_DATA_SELECT = '''
+    SELECT coin, ticker, date, open_price, close_price, high_price, low_price,
+           total_volume, buy_volume, sell_volume, net_volume,
+           buy_volume_usd, sell_volume_usd, net_volume_usd, price_change_pct
+    FROM etf_data
+'''
 
 
-def get_etf_data(coin='BTC', start_date=None, end_date=None, limit=None):
+def get_etf_data(coin='BTC', start_date=None, end_date=None, limit=None, before_date=None,
+                 columnar=False):
     """
     Retrieve ETF volume data for a coin
     
@@ -548,33 +1019,29 @@ def get_etf_data(coin='BTC', start_date=None, end_date=None, limit=None):
         start_date: Start date filter (inclusive)
         end_date: End date filter (inclusive)
         limit: Maximum number of records
+        before_date: Pagination cursor, only dates before it (exclusive)
+        columnar: Return {column: [values]} instead of a list of row dicts
     
     Returns:
         List of ETF volume data dictionaries
     """
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        query = '''
-            SELECT * FROM etf_data 
-            WHERE coin = ?
-        '''
-        params = [coin]
-        
-        if start_date:
-            query += ' AND date >= ?'
-            params.append(start_date)
-        
-        if end_date:
-            query += ' AND date <= ?'
-            params.append(end_date)
-        
-        query += ' ORDER BY date DESC'
-        
+        conditions, params = _present(DATE_FILTERS, (start_date, end_date, before_date))
+        params.insert(0, coin)
+        tail = ' ORDER BY date DESC'
         if limit:
-            query += ' LIMIT ?'
+            tail += ' LIMIT ?'
             params.append(limit)
         
+        query = _filtered_sql(ETF_DATA_SELECT, ('coin = ?',) + conditions, tail)
+        
+        if columnar:
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            return _fetch_columns(cursor)
+        
         cursor.execute(query, params)
         rows = cursor.fetchall()
         
@@ -583,27 +1050,95 @@ def get_etf_data(coin='BTC', start_date=None, end_date=None, limit=None):
 
 def get_etf_date_range(coin='BTC'):
     """Get the date range of available ETF data for a coin"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT MIN(date) as earliest, MAX(date) as latest, COUNT(*) as count
-            FROM etf_data WHERE coin = ?
-        ''', (coin,))
-        row = cursor.fetchone()
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(SQL_ETF_DATE_RANGE, (coin,)).fetchone()
         return dict(row) if row else None
 
 
 def get_etf_latest_date(coin='BTC') -> str:
     """Get the most recent date we have ETF data for"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT MAX(date) as latest FROM etf_data WHERE coin = ?
-        ''', (coin,))
-        row = cursor.fetchone()
+    with get_db_connection(readonly=True) as conn:
+        row = conn.execute(SQL_ETF_LATEST_DATE, (coin,)).fetchone()
         return row['latest'] if row and row['latest'] else None
 
 
+# Columns stored directly on smart_alerts; every other alert key goes into metadata
+SMART_ALERT_COLUMNS = ['coin', 'date', 'type', 'severity', 'description',
+                       'value_usd', 'volume', 'price', 'zscore', 'size_class', 'rsi']
+
+_SMART_ALERT_INSERT = '''
+    INSERT INTO smart_alerts (
+        coin, date, alert_type, severity, description,
+        value_usd, volume, price, zscore, size_class, rsi, metadata
+    ) VALUES '''
+
+# SQLite 3.45+ stores alert metadata as pre-parsed JSONB; older builds keep
+# JSON text. json(metadata) reads either form back as text.
+SQLITE_HAS_JSONB = sqlite3.sqlite_version_info >= (3, 45, 0)
+
+_SMART_ALERT_ROW = ('(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, jsonb(?))' if SQLITE_HAS_JSONB
+                    else '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+
+_SMART_ALERT_CONFLICT = '''
+    ON CONFLICT(coin, date, alert_type) DO UPDATE SET
+        severity = excluded.severity,
+        description = excluded.description,
+        value_usd = excluded.value_usd,
+        volume = excluded.volume,
+        price = excluded.price,
+        zscore = excluded.zscore,
+        size_class = excluded.size_class,
+        rsi = excluded.rsi,
+        metadata = excluded.metadata,
+        timestamp = CURRENT_TIMESTAMP
+'''
+
+UPSERT_SMART_ALERT_SQL = _SMART_ALERT_INSERT + _SMART_ALERT_ROW + _SMART_ALERT_CONFLICT
+
+_SMART_ALERT_SELECT = '''
+    SELECT id, coin, date, alert_type, severity, description,
+           value_usd, volume, price, zscore, size_class, rsi{metadata},
+           timestamp, acknowledged
+    FROM smart_alerts
+'''
+
+SMART_ALERT_SELECT = _SMART_ALERT_SELECT.format(metadata='')
+
+# Optional get_smart_alerts() filters, in parameter order
+SMART_ALERT_FILTERS = ('coin = ?', 'date >= ?', 'date <= ?', 'severity = ?', 'alert_type = ?')
+
+SMART_ALERT_SELECT_METADATA = _SMART_ALERT_SELECT.format(
+    metadata=', json(metadata) as metadata' if SQLITE_HAS_JSONB else ', metadata'
+)
+
+# Rows per multi-row upsert (80 rows x 12 params stays under SQLite's 999-variable limit)
+SMART_ALERT_BATCH_ROWS = 80
+
+
+def _smart_alert_params(alert: dict) -> tuple:
+    """Build the UPSERT_SMART_ALERT_SQL parameters for an alert"""
+    # Prepare metadata JSON
+    metadata = {
+        k: v for k, v in alert.items()
+        if k not in SMART_ALERT_COLUMNS
+    }
+    
+    return (
+        alert.get('coin'),
+        alert.get('date'),
+        alert.get('type'),
+        alert.get('severity', 'low'),
+        alert.get('description'),
+        alert.get('value_usd'),
+        alert.get('volume'),
+        alert.get('price'),
+        alert.get('zscore'),
+        alert.get('size_class'),
+        alert.get('rsi'),
+        json.dumps(metadata, separators=(',', ':'))
+    )
+
+
 def upsert_smart_alert(alert: dict):
     """
     Insert or update a smart alert
@@ -614,55 +1149,43 @@ def upsert_smart_alert(alert: dict):
     Returns:
         Alert ID
     """
-    import json
+    with write_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(UPSERT_SMART_ALERT_SQL, _smart_alert_params(alert))
     
-    with get_db_connection() as conn:
+    return cursor.lastrowid
+
+
+def upsert_smart_alerts(alerts: list):
+    """
+    Insert or update many smart alerts in a single transaction
+    
+    Alerts are written with multi-row VALUES statements of up to
+    SMART_ALERT_BATCH_ROWS rows each rather than one statement per alert.
+    
+    Args:
+        alerts: List of alert dictionaries
+    
+    Returns:
+        Number of alerts written
+    """
+    if not alerts:
+        return 0
+    
+    with write_transaction() as conn:
         cursor = conn.cursor()
-        
-        # Prepare metadata JSON
-        metadata = {
-            k: v for k, v in alert.items()
-            if k not in ['coin', 'date', 'type', 'severity', 'description', 
-                        'value_usd', 'volume', 'price', 'zscore', 'size_class', 'rsi']
-        }
-        
-        cursor.execute('''
-            INSERT INTO smart_alerts (
-                coin, date, alert_type, severity, description,
-                value_usd, volume, price, zscore, size_class, rsi, metadata
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(coin, date, alert_type) DO UPDATE SET
-                severity = excluded.severity,
-                description = excluded.description,
-                value_usd = excluded.value_usd,
-                volume = excluded.volume,
-                price = excluded.price,
-                zscore = excluded.zscore,
-                size_class = excluded.size_class,
-                rsi = excluded.rsi,
-                metadata = excluded.metadata,
-                timestamp = CURRENT_TIMESTAMP
-        ''', (
-            alert.get('coin'),
-            alert.get('date'),
-            alert.get('type'),
-            alert.get('severity', 'low'),
-            alert.get('description'),
-            alert.get('value_usd'),
-            alert.get('volume'),
-            alert.get('price'),
-            alert.get('zscore'),
-            alert.get('size_class'),
-            alert.get('rsi'),
-            json.dumps(metadata)
-        ))
-        
-        conn.commit()
-        return cursor.lastrowid
+        for start in range(0, len(alerts), SMART_ALERT_BATCH_ROWS):
+            batch = alerts[start:start + SMART_ALERT_BATCH_ROWS]
+            sql = (_SMART_ALERT_INSERT + ', '.join([_SMART_ALERT_ROW] * len(batch)) +
+                   _SMART_ALERT_CONFLICT)
+            params = [value for alert in batch for value in _smart_alert_params(alert)]
+            cursor.execute(sql, params)
+    
+    return len(alerts)
 
 
 def get_smart_alerts(coin=None, start_date=None, end_date=None, 
-                     severity=None, alert_type=None, limit=100):
+                     severity=None, alert_type=None, limit=100, include_metadata=True):
     """
     Retrieve smart alerts with filters
     
@@ -673,44 +1196,30 @@ def get_smart_alerts(coin=None, start_date=None, end_date=None,
         severity: Filter by severity (critical, high, medium, low)
         alert_type: Filter by alert type
         limit: Maximum records
+        include_metadata: Load and merge the metadata JSON into each alert
     
     Returns:
         List of alert dictionaries
     """
-    import json
-    
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        query = 'SELECT * FROM smart_alerts WHERE 1=1'
-        params = []
-        
-        if coin:
-            query += ' AND coin = ?'
-            params.append(coin)
-        
-        if start_date:
-            query += ' AND date >= ?'
-            params.append(start_date)
-        
-        if end_date:
-            query += ' AND date <= ?'
-            params.append(end_date)
-        
-        if severity:
-            query += ' AND severity = ?'
-            params.append(severity)
-        
-        if alert_type:
-            query += ' AND alert_type = ?'
-            params.append(alert_type)
-        
-        query += ' ORDER BY timestamp DESC LIMIT ?'
+        conditions, params = _present(
+            SMART_ALERT_FILTERS, (coin, start_date, end_date, severity, alert_type)
+        )
         params.append(limit)
         
+        query = _filtered_sql(
+            SMART_ALERT_SELECT_METADATA if include_metadata else SMART_ALERT_SELECT,
+            conditions, ' ORDER BY timestamp DESC LIMIT ?'
+        )
+        
         cursor.execute(query, params)
         rows = cursor.fetchall()
         
+        if not include_metadata:
+            return [dict(row) for row in rows]
+        
         alerts = []
         for row in rows:
             alert = dict(row)
@@ -726,6 +1235,11 @@ def get_smart_alerts(coin=None, start_date=None, end_date=None,
         return alerts
 
 
+def _utc_cutoff_date(days):
+    """ISO date `days` days before today in UTC (same as SQLite's date('now', '-N days'))"""
+    return (datetime.now(timezone.utc).date() - timedelta(days=days)).isoformat()
+
+
 def get_alert_summary(coin=None, days=7):
     """
     Get summary of recent alerts
@@ -737,22 +1251,23 @@ def get_alert_summary(coin=None, days=7):
     Returns:
         Summary dictionary
     """
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
         query = '''
             SELECT 
                 COUNT(*) as total_alerts,
-                SUM(CASE WHEN severity = 'critical' THEN 1 ELSE 0 END) as critical,
-                SUM(CASE WHEN severity = 'high' THEN 1 ELSE 0 END) as high,
-                SUM(CASE WHEN severity = 'medium' THEN 1 ELSE 0 END) as medium,
-                SUM(CASE WHEN severity = 'low' THEN 1 ELSE 0 END) as low,
+                COUNT(*) FILTER (WHERE severity = 'critical') as critical,
+                COUNT(*) FILTER (WHERE severity = 'high') as high,
+                COUNT(*) FILTER (WHERE severity = 'medium') as medium,
+                COUNT(*) FILTER (WHERE severity = 'low') as low,
                 COUNT(DISTINCT alert_type) as unique_types,
                 COUNT(DISTINCT coin) as coins_affected
             FROM smart_alerts
-            WHERE date >= date('now', '-' || ? || ' days')
+            WHERE date >= ?
         '''
-        params = [days]
+        # Bind the cutoff as a constant so it is a plain index range
+        params = [_utc_cutoff_date(days)]
         
         if coin:
             query += ' AND coin = ?'
@@ -780,61 +1295,150 @@ def delete_old_alerts(days=90):
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "DELETE FROM smart_alerts WHERE date < date('now', '-' || ? || ' days')",
-            (days,)
+            'DELETE FROM smart_alerts WHERE date < ?',
+            (_utc_cutoff_date(days),)
         )
         conn.commit()
+        
+        # Hand freed pages back to the OS (no-op unless auto_vacuum=INCREMENTAL);
+        # executescript steps the pragma to completion, execute() frees one page
+        if cursor.rowcount:
+            conn.executescript('PRAGMA incremental_vacuum(1000)')
         return cursor.rowcount
 
 
+UPSERT_FUTURES_METRICS_SQL = '''
+    INSERT INTO futures_metrics (
+        coin, symbol, date, spot_price, futures_price,
+        premium_pct, funding_rate, funding_rate_annualized, open_interest
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(symbol, date) DO UPDATE SET
+        spot_price = excluded.spot_price,
+        futures_price = excluded.futures_price,
+        premium_pct = excluded.premium_pct,
+        funding_rate = excluded.funding_rate,
+        funding_rate_annualized = excluded.funding_rate_annualized,
+        open_interest = excluded.open_interest,
+        timestamp = CURRENT_TIMESTAMP
+'''
+
+
+def _futures_metrics_params(metrics: dict, date_str: str) -> tuple:
+    """Build the UPSERT_FUTURES_METRICS_SQL parameters for a metrics dict"""
+    return (
+        metrics.get('coin'),
+        metrics.get('symbol'),
+        date_str,
+        metrics.get('spot_price'),
+        metrics.get('futures_price'),
+        metrics.get('premium_pct'),
+        metrics.get('funding_rate'),
+        metrics.get('funding_rate_annualized'),
+        metrics.get('open_interest')
+    )
+
+
+# upsert_futures_metrics() only queues rows; they are written together, one
+# transaction per FUTURES_FLUSH_INTERVAL seconds, by a timer thread
+FUTURES_FLUSH_INTERVAL = 2.0
+
+_futures_buffer = []
+_futures_buffer_lock = threading.Lock()
+_futures_flush_timer = None
+# Serializes flushes so batches are committed in the order they were queued
+_futures_flush_lock = threading.Lock()
+
+
 def upsert_futures_metrics(metrics: dict):
     """
-    Insert or update futures metrics
+    Queue futures metrics for insert/update
+    
+    The row is written by the next flush (at most FUTURES_FLUSH_INTERVAL
+    seconds later, or by flush_futures_metrics()).
     
     Args:
         metrics: Futures metrics dictionary
     
     Returns:
-        Record ID
+        (symbol, date) key of the record
     """
-    from datetime import datetime
+    global _futures_flush_timer
     
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Use current date
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        
-        cursor.execute('''
-            INSERT INTO futures_metrics (
-                coin, symbol, date, spot_price, futures_price,
-                premium_pct, funding_rate, funding_rate_annualized, open_interest
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(symbol, date) DO UPDATE SET
-                spot_price = excluded.spot_price,
-                futures_price = excluded.futures_price,
-                premium_pct = excluded.premium_pct,
-                funding_rate = excluded.funding_rate,
-                funding_rate_annualized = excluded.funding_rate_annualized,
-                open_interest = excluded.open_interest,
-                timestamp = CURRENT_TIMESTAMP
-        ''', (
-            metrics.get('coin'),
-            metrics.get('symbol'),
-            date_str,
-            metrics.get('spot_price'),
-            metrics.get('futures_price'),
-            metrics.get('premium_pct'),
-            metrics.get('funding_rate'),
-            metrics.get('funding_rate_annualized'),
-            metrics.get('open_interest')
-        ))
-        
-        conn.commit()
-        return cursor.lastrowid
+    # Use current date
+    date_str = datetime.now().strftime('%Y-%m-%d')
+    params = _futures_metrics_params(metrics, date_str)
+    
+    with _futures_buffer_lock:
+        _futures_buffer.append(params)
+        if _futures_flush_timer is None:
+            _futures_flush_timer = threading.Timer(FUTURES_FLUSH_INTERVAL, flush_futures_metrics)
+            _futures_flush_timer.daemon = True
+            _futures_flush_timer.start()
+    
+    return metrics.get('symbol'), date_str
+
+
+def flush_futures_metrics():
+    """
+    Write all queued futures metrics now
+    
+    Returns:
+        Number of records written
+    """
+    global _futures_buffer, _futures_flush_timer
+    
+    with _futures_flush_lock:
+        with _futures_buffer_lock:
+            rows, _futures_buffer = _futures_buffer, []
+            timer, _futures_flush_timer = _futures_flush_timer, None
+        
+        # Called directly (not from the timer): the pending timer has nothing left to do
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+        
+        if rows:
+            with write_transaction() as conn:
+                conn.executemany(UPSERT_FUTURES_METRICS_SQL, rows)
+        return len(rows)
+
+
+# Runs before close_all_connections (atexit handlers run in reverse order)
+atexit.register(flush_futures_metrics)
 
 
-def get_futures_metrics(coin=None, start_date=None, end_date=None, limit=30):
+def upsert_futures_metrics_bulk(metrics_list: list):
+    """
+    Insert or update many futures metrics (e.g. one per coin) in a single transaction
+    
+    Args:
+        metrics_list: List of futures metrics dictionaries
+    
+    Returns:
+        Number of records written
+    """
+    if not metrics_list:
+        return 0
+    
+    date_str = datetime.now().strftime('%Y-%m-%d')
+    
+    # Queue behind any pending single upserts and write everything at once,
+    # so an older queued row can't be flushed later over these
+    with _futures_buffer_lock:
+        _futures_buffer.extend(_futures_metrics_params(m, date_str) for m in metrics_list)
+    flush_futures_metrics()
+    return len(metrics_list)
+
+
+# Columns returned by get_futures_metrics; the same for old (rowid) and
+# new (WITHOUT ROWID) futures_metrics tables
+FUTURES_METRICS_SELECT = '''
+    SELECT coin, symbol, date, spot_price, futures_price, premium_pct,
+           funding_rate, funding_rate_annualized, open_interest, timestamp
+    FROM futures_metrics
+'''
+
+
+def get_futures_metrics(coin=None, start_date=None, end_date=None, limit=30, before_date=None):
     """
     Retrieve futures metrics
     
@@ -843,31 +1447,21 @@ def get_futures_metrics(coin=None, start_date=None, end_date=None, limit=30):
         start_date: Start date filter
         end_date: End date filter
         limit: Maximum records
+        before_date: Only rows strictly older than this date (pagination cursor)
     
     Returns:
         List of futures metrics
     """
-    with get_db_connection() as conn:
+    with get_db_connection(readonly=True) as conn:
         cursor = conn.cursor()
         
-        query = 'SELECT * FROM futures_metrics WHERE 1=1'
-        params = []
-        
-        if coin:
-            query += ' AND coin = ?'
-            params.append(coin)
-        
-        if start_date:
-            query += ' AND date >= ?'
-            params.append(start_date)
-        
-        if end_date:
-            query += ' AND date <= ?'
-            params.append(end_date)
-        
-        query += ' ORDER BY date DESC LIMIT ?'
+        conditions, params = _present(
+            ('coin = ?',) + DATE_FILTERS, (coin, start_date, end_date, before_date)
+        )
         params.append(limit)
         
+        query = _filtered_sql(FUTURES_METRICS_SELECT, conditions, ' ORDER BY date DESC LIMIT ?')
+        
         cursor.execute(query, params)
         rows = cursor.fetchall()
         
@@ -3,23 +3,151 @@ Yahoo Finance ETF Data Fetcher
 Fetches ETF price and volume data for accumulation/distribution analysis
 """
 
-import requests
+import hashlib
+import os
 import time
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import numpy as np
+import orjson
+import requests
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+from typing import List, Dict, NamedTuple, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 import config
 
 # Yahoo Finance API endpoints
 YF_BASE_URL = "https://query1.finance.yahoo.com/v8/finance/chart"
 
-# Rate limiting
-REQUEST_DELAY = 0.2  # 200ms between requests
+# Cap on in-flight Yahoo requests per coin (keeps us under Yahoo's rate limit)
+MAX_CONCURRENT_REQUESTS = 4
+
+# On-disk cache of parsed ETF history, one file per ticker. Within
+# ETF_CACHE_TTL it is served as-is; after that only the last few days are
+# re-requested and merged in, with a full re-download every
+# ETF_CACHE_FULL_REFRESH (picks up any revisions to older bars)
+ETF_CACHE_DIR = os.environ.get('ETF_CACHE_DIR', os.path.join('.cache', 'etf'))
+ETF_CACHE_TTL = 6 * 3600  # seconds
+ETF_CACHE_FULL_REFRESH = 7 * 86400  # seconds
+ETF_CACHE_FORMAT = 3  # bump when the cache file layout changes
+
+# Days before the newest cached bar that an incremental fetch re-requests
+# (the latest bars may still be revised)
+INCREMENTAL_OVERLAP_DAYS = 2
+
+# Shared pooled session (see get_session)
+_session = None
+_session_lock = threading.Lock()
+
+
+# EtfRow fields that are summed across ETFs when aggregating per coin
+ETF_VOLUME_FIELDS = (
+    'total_volume', 'buy_volume', 'sell_volume', 'net_volume',
+    'buy_volume_usd', 'sell_volume_usd', 'net_volume_usd'
+)
+
+
+class EtfRow(NamedTuple):
+    """One parsed day of a single ETF (fetch_etf_data output)"""
+    ticker: str
+    date: str
+    open_price: float
+    close_price: float
+    high_price: float
+    low_price: float
+    total_volume: float
+    buy_volume: float
+    sell_volume: float
+    net_volume: float
+    buy_volume_usd: float
+    sell_volume_usd: float
+    net_volume_usd: float
+    price_change_pct: float
+
+
+# EtfRow fields holding numbers (everything but ticker and date)
+ETF_NUMERIC_FIELDS = EtfRow._fields[2:]
+
+
+class _CachedHistory(NamedTuple):
+    saved_at: float  # file mtime (last fetch, full or incremental)
+    full_at: float  # when the full history was last downloaded
+    rows: List['EtfRow']
+
+
+def _cache_path(ticker: str, interval: str) -> str:
+    """Cache file for a ticker's history"""
+    key = hashlib.md5(f"{ticker}|{interval}|{ETF_CACHE_FORMAT}".encode()).hexdigest()
+    return os.path.join(ETF_CACHE_DIR, f"{key}.json")
+
+
+def _cache_get(path: str) -> Optional[_CachedHistory]:
+    """Load a ticker's cached history, or None if there is no usable file"""
+    try:
+        saved_at = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            cached = orjson.loads(f.read())
+        return _CachedHistory(saved_at, cached['full_at'], [EtfRow._make(row) for row in cached['rows']])
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+def _cache_set(path: str, rows: List['EtfRow'], full_at: float):
+    """Write rows to the cache as JSON arrays (atomically, so readers never see a partial file)"""
+    try:
+        os.makedirs(ETF_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({'full_at': full_at, 'rows': rows}, default=tuple))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write ETF cache: {e}")
+
+
+def _day_start_ts(date_str: str) -> int:
+    """Unix timestamp of 00:00 UTC on a YYYY-MM-DD date"""
+    return int(datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+
+
+def _window_start_ts(cutoff: datetime) -> int:
+    """
+    Yahoo period1 for a local-time cutoff, padded a few days so timezone
+    offsets and bar timestamps never clip the first wanted day (callers
+    trim to the exact cutoff date)
+    """
+    return int((cutoff - timedelta(days=5)).timestamp())
+
+
+def _ts_date(ts: int) -> str:
+    """YYYY-MM-DD (UTC) of a unix timestamp"""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
 
 
 def get_session() -> requests.Session:
-    """Create a requests session with proxy if configured"""
+    """Get the shared requests session, creating it (with proxy if configured) on first use"""
+    global _session
+    if _session is not None:
+        return _session
+    
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+    return _session
+
+
+def _create_session() -> requests.Session:
+    """Create a pooled keep-alive requests session with proxy if configured"""
     session = requests.Session()
     
+    # Connections are kept alive across tickers and syncs (coins sync in
+    # parallel, so leave room for several coins' ticker fetches at once)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    
     proxy_url = config.get_proxy_url()
     if proxy_url:
         session.proxies = {
@@ -27,33 +155,136 @@ def get_session() -> requests.Session:
             'https': proxy_url
         }
     
-    # Set user agent to avoid blocking
+    # Set user agent to avoid blocking; advertise every encoding urllib3 can
+    # decode (gzip/deflate, plus br with brotli) since full-history chart
+    # JSON compresses several-fold
     session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept-Encoding': ACCEPT_ENCODING
     })
     
     return session
 
 
-def fetch_etf_data(ticker: str, period: str = "max", interval: str = "1d",
-                   session: Optional[requests.Session] = None) -> List[Dict]:
+def _quote_column(values: List, length: int) -> np.ndarray:
+    """Float column padded/truncated to length, with missing values as 0"""
+    column = np.zeros(length, dtype=np.float64)
+    values = values[:length]
+    if values:
+        # None converts to NaN in the float cast (JSON has no real NaNs)
+        column[:len(values)] = np.nan_to_num(np.array(values, dtype=np.float64), nan=0.0)
+    return column
+
+
+def parse_etf_quotes(ticker: str, timestamps: List, quote: Dict) -> List[EtfRow]:
     """
-    Fetch ETF historical data from Yahoo Finance
+    Parse a Yahoo chart quote block into per-day ETF records
+    
+    Works on whole columns with NumPy rather than looping per day. Missing
+    prices/volumes count as 0 and days without a close are dropped.
     
     Args:
-        ticker: ETF ticker symbol (e.g., IBIT, ETHA)
-        period: Data period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
-        interval: Data interval (1d, 1wk, 1mo)
-        session: Optional requests session with proxy
+        ticker: ETF ticker symbol
+        timestamps: Chart timestamps (unix seconds, may contain None)
+        quote: indicators.quote[0] from the chart response
     
     Returns:
-        List of parsed ETF data dictionaries
+        List of parsed ETF rows, sorted by date
     """
-    if session is None:
-        session = get_session()
+    if not timestamps:
+        return []
+    
+    n = len(timestamps)
+    open_price = _quote_column(quote.get('open', []), n)
+    high_price = _quote_column(quote.get('high', []), n)
+    low_price = _quote_column(quote.get('low', []), n)
+    close_price = _quote_column(quote.get('close', []), n)
+    volume = _quote_column(quote.get('volume', []), n)
+    
+    # Missing timestamps become NaN in the float cast; epoch seconds fit
+    # exactly in a float64
+    ts = np.array(timestamps, dtype=np.float64)
+    
+    # Skip missing timestamps and invalid data points
+    keep = ~np.isnan(ts) & (close_price != 0)
+    if not keep.all():
+        ts, open_price, high_price, low_price, close_price, volume = (
+            col[keep] for col in (ts, open_price, high_price, low_price, close_price, volume)
+        )
+    if not len(ts):
+        return []
+    
+    # Yahoo returns bars in time order; guarantee it so callers can bisect
+    if (np.diff(ts) < 0).any():
+        by_time = np.argsort(ts, kind='stable')
+        ts, open_price, high_price, low_price, close_price, volume = (
+            col[by_time] for col in (ts, open_price, high_price, low_price, close_price, volume)
+        )
+    
+    # UTC calendar day of each bar, formatted in one pass
+    dates = np.datetime_as_string(ts.astype(np.int64).astype('datetime64[s]'), unit='D')
+    
+    # For ETFs, we use improved buy/sell estimation
+    # Method: On-Balance Volume (OBV) based approach
+    # This is more accurate than simple price direction
+    
+    # Calculate price change metrics (left at 0 where open is not positive)
+    has_open = open_price > 0
+    price_change = np.where(has_open, close_price - open_price, 0.0)
+    price_change_pct = np.divide(price_change, open_price,
+                                 out=np.zeros_like(open_price), where=has_open) * 100
+    
+    # Intraday range to gauge volatility
+    price_range = np.where(high_price > low_price, high_price - low_price, 0.01)
+    close_position = (close_price - low_price) / price_range
+    
+    # Improved buy/sell estimation using multiple factors:
+    # 1. Close position in daily range (higher = more buying)
+    # 2. Price change percentage (momentum)
+    # 3. Volume magnitude (higher volume = more reliable signal)
+    
+    # Adjust for price momentum (±10% max adjustment), then bound the
+    # final buy ratio to [0.2, 0.8] to avoid extremes
+    momentum_adjustment = np.clip(price_change_pct / 10, -0.1, 0.1)
+    buy_ratio = np.clip(close_position + momentum_adjustment, 0.2, 0.8)
+    
+    # Special cases:
+    # Strong up day with close near high / strong down day with close near low
+    buy_ratio = np.where((price_change_pct > 3) & (close_position > 0.8), 0.85,
+                         np.where((price_change_pct < -3) & (close_position < 0.2), 0.15, buy_ratio))
+    
+    buy_volume = volume * buy_ratio
+    sell_volume = volume * (1 - buy_ratio)
+    net_volume = buy_volume - sell_volume
+    
+    # USD calculations
+    avg_price = (open_price + close_price) / 2
     
+    columns = zip(
+        dates.tolist(),
+        np.round(open_price, 4).tolist(), np.round(close_price, 4).tolist(),
+        np.round(high_price, 4).tolist(), np.round(low_price, 4).tolist(),
+        volume.tolist(),
+        np.round(buy_volume, 2).tolist(), np.round(sell_volume, 2).tolist(),
+        np.round(net_volume, 2).tolist(),
+        np.round(buy_volume * avg_price, 2).tolist(),
+        np.round(sell_volume * avg_price, 2).tolist(),
+        np.round(net_volume * avg_price, 2).tolist(),
+        np.round(price_change_pct, 4).tolist()
+    )
+    return [EtfRow(ticker, *row) for row in columns]
+
+
+def _request_chart(ticker: str, interval: str, period1: int,
+                   session: requests.Session) -> Optional[List['EtfRow']]:
+    """
+    Request and parse Yahoo chart bars from period1 (unix seconds) to now
+    
+    Returns:
+        Parsed rows ([] if Yahoo has no data), or None if the request failed
+    """
     params = {
-        "period1": 0,  # Start from beginning
+        "period1": period1,
         "period2": int(datetime.now().timestamp()),
         "interval": interval,
         "events": "history",
@@ -64,7 +295,7 @@ def fetch_etf_data(ticker: str, period: str = "max", interval: str = "1d",
         url = f"{YF_BASE_URL}/{ticker}"
         response = session.get(url, params=params, timeout=30)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         result = data.get('chart', {}).get('result', [])
         if not result:
@@ -76,99 +307,159 @@ def fetch_etf_data(ticker: str, period: str = "max", interval: str = "1d",
         indicators = chart_data.get('indicators', {})
         quote = indicators.get('quote', [{}])[0]
         
-        opens = quote.get('open', [])
-        highs = quote.get('high', [])
-        lows = quote.get('low', [])
-        closes = quote.get('close', [])
-        volumes = quote.get('volume', [])
-        
-        parsed_data = []
-        
-        for i, ts in enumerate(timestamps):
-            if ts is None:
-                continue
-                
-            date_str = datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d')
-            
-            open_price = opens[i] if i < len(opens) and opens[i] is not None else 0
-            high_price = highs[i] if i < len(highs) and highs[i] is not None else 0
-            low_price = lows[i] if i < len(lows) and lows[i] is not None else 0
-            close_price = closes[i] if i < len(closes) and closes[i] is not None else 0
-            volume = volumes[i] if i < len(volumes) and volumes[i] is not None else 0
-            
-            # Skip invalid data points
-            if close_price == 0:
-                continue
-            
-            # For ETFs, we use improved buy/sell estimation
-            # Method: On-Balance Volume (OBV) based approach
-            # This is more accurate than simple price direction
-            
-            # Calculate price change metrics
-            price_change = close_price - open_price if open_price > 0 else 0
-            price_change_pct = (price_change / open_price * 100) if open_price > 0 else 0
-            
-            # Intraday range to gauge volatility
-            price_range = high_price - low_price if high_price > low_price else 0.01
-            close_position = (close_price - low_price) / price_range if price_range > 0 else 0.5
-            
-            # Improved buy/sell estimation using multiple factors:
-            # 1. Close position in daily range (higher = more buying)
-            # 2. Price change percentage (momentum)
-            # 3. Volume magnitude (higher volume = more reliable signal)
-            
-            # Base ratio from close position (0.0 to 1.0)
-            base_buy_ratio = close_position
-            
-            # Adjust for price momentum (±10% max adjustment)
-            momentum_adjustment = min(max(price_change_pct / 10, -0.1), 0.1)
-            
-            # Final buy ratio with bounds [0.2, 0.8] to avoid extremes
-            buy_ratio = min(max(base_buy_ratio + momentum_adjustment, 0.2), 0.8)
-            
-            # Special cases:
-            # Strong up day with close near high
-            if price_change_pct > 3 and close_position > 0.8:
-                buy_ratio = 0.85
-            # Strong down day with close near low
-            elif price_change_pct < -3 and close_position < 0.2:
-                buy_ratio = 0.15
-            
-            buy_volume = volume * buy_ratio
-            sell_volume = volume * (1 - buy_ratio)
-            net_volume = buy_volume - sell_volume
-            
-            # USD calculations
-            avg_price = (open_price + close_price) / 2
-            buy_volume_usd = buy_volume * avg_price
-            sell_volume_usd = sell_volume * avg_price
-            net_volume_usd = net_volume * avg_price
-            
-            parsed_data.append({
-                'ticker': ticker,
-                'date': date_str,
-                'open_price': round(open_price, 4),
-                'close_price': round(close_price, 4),
-                'high_price': round(high_price, 4),
-                'low_price': round(low_price, 4),
-                'total_volume': volume,
-                'buy_volume': round(buy_volume, 2),
-                'sell_volume': round(sell_volume, 2),
-                'net_volume': round(net_volume, 2),
-                'buy_volume_usd': round(buy_volume_usd, 2),
-                'sell_volume_usd': round(sell_volume_usd, 2),
-                'net_volume_usd': round(net_volume_usd, 2),
-                'price_change_pct': round(price_change_pct, 4)
-            })
+        return parse_etf_quotes(ticker, timestamps, quote)
         
-        return parsed_data
-        
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         print(f"Error fetching ETF data for {ticker}: {e}")
-        return []
-    except (KeyError, IndexError, TypeError) as e:
+        return None
+    except (KeyError, IndexError, TypeError, ValueError) as e:
         print(f"Error parsing ETF data for {ticker}: {e}")
+        return None
+
+
+def fetch_etf_data(ticker: str, period: str = "max", interval: str = "1d",
+                   session: Optional[requests.Session] = None,
+                   start_ts: Optional[int] = None) -> List[EtfRow]:
+    """
+    Fetch ETF historical data from Yahoo Finance
+    
+    Full history is cached on disk per ticker. A cache younger than
+    ETF_CACHE_TTL is served without a request; an older one is extended by
+    requesting only the last few days. Without a cache, only the window
+    from start_ts is requested when one is given (and not cached).
+    
+    Args:
+        ticker: ETF ticker symbol (e.g., IBIT, ETHA)
+        period: Data period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max)
+        interval: Data interval (1d, 1wk, 1mo)
+        session: Optional requests session with proxy
+        start_ts: Optional unix timestamp; only rows on or after its UTC
+            date are returned (None = all history)
+    
+    Returns:
+        List of parsed ETF rows (plain tuples with named fields), sorted by date
+    """
+    if session is None:
+        session = get_session()
+    
+    start_date = _ts_date(start_ts) if start_ts is not None else None
+    cache_path = _cache_path(ticker, interval)
+    cached = _cache_get(cache_path)
+    now = time.time()
+    
+    if cached is not None and now - cached.saved_at < ETF_CACHE_TTL:
+        rows = cached.rows
+    elif cached is not None and cached.rows and now - cached.full_at < ETF_CACHE_FULL_REFRESH:
+        # Re-request only the tail and splice it onto the cached history
+        restart_ts = _day_start_ts(cached.rows[-1].date) - INCREMENTAL_OVERLAP_DAYS * 86400
+        fresh = _request_chart(ticker, interval, restart_ts, session)
+        if fresh is None:
+            rows = cached.rows  # Serve the stale history rather than nothing
+        else:
+            rows = cached.rows[:bisect_left(cached.rows, _ts_date(restart_ts), key=attrgetter('date'))] + fresh
+            _cache_set(cache_path, rows, cached.full_at)
+    elif start_ts is not None:
+        # Nothing to extend and only a recent window wanted: fetch just that
+        return _request_chart(ticker, interval, start_ts, session) or []
+    else:
+        rows = _request_chart(ticker, interval, 0, session) or []  # Start from beginning
+        if rows:
+            _cache_set(cache_path, rows, now)
+    
+    return _rows_since(rows, start_date) if start_date else rows
+
+
+def _rows_since(rows: List[EtfRow], cutoff_date: str) -> List[EtfRow]:
+    """Tail of date-sorted rows from cutoff_date (YYYY-MM-DD) on, found by bisection"""
+    return rows[bisect_left(rows, cutoff_date, key=attrgetter('date')):]
+
+
+def aggregate_etf_records(coin: str, records: List[EtfRow]) -> List[Dict]:
+    """
+    Aggregate per-ETF daily records into one record per date
+    
+    Volumes are summed across ETFs, close is the mean close, high/low are
+    the extremes, and open/price_change_pct come from the first ETF with
+    data for that day. Grouping and reductions run as NumPy column ops.
+    
+    Args:
+        coin: Base coin the ETFs track
+        records: ETF records (fetch_etf_data output) in ticker priority order
+    
+    Returns:
+        List of aggregated records, in order of first appearance by date,
+        with 'ticker' holding the contributing tickers joined by '|'
+    """
+    if not records:
         return []
+    
+    # Transpose once: field name -> tuple of that field across all rows
+    fields = dict(zip(EtfRow._fields, zip(*records)))
+    dates = np.array(fields['date'])
+    unique_dates, first_index, inverse = np.unique(dates, return_index=True, return_inverse=True)
+    
+    # Number groups by first appearance so output order follows the input
+    order = np.argsort(first_index, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    group = rank[inverse]
+    n_groups = len(order)
+    
+    # Stable sort by group: each date becomes one contiguous run of rows,
+    # still in ticker priority order, so every reduction is a reduceat
+    by_group = np.argsort(group, kind='stable')
+    counts = np.bincount(group, minlength=n_groups)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    
+    # Numeric fields as one (rows x fields) matrix in run order
+    values = np.array([fields[f] for f in ETF_NUMERIC_FIELDS], dtype=np.float64).T[by_group]
+    col = {f: i for i, f in enumerate(ETF_NUMERIC_FIELDS)}
+    
+    # Sum volumes (these represent total market flow) and closes in one pass
+    sums = np.add.reduceat(values, starts, axis=0)
+    
+    # Average price across ETFs
+    close_price = (sums[:, col['close_price']] / counts).tolist()
+    
+    # Take extremes for high/low
+    high_price = np.maximum.reduceat(values[:, col['high_price']], starts).tolist()
+    low_price = np.minimum.reduceat(values[:, col['low_price']], starts).tolist()
+    
+    # First ETF with data for the day supplies open and price change
+    firsts = values[starts]
+    open_price = firsts[:, col['open_price']].tolist()
+    price_change_pct = firsts[:, col['price_change_pct']].tolist()
+    
+    (total_volume, buy_volume, sell_volume, net_volume,
+     buy_volume_usd, sell_volume_usd, net_volume_usd) = (
+        sums[:, col[f]].tolist() for f in ETF_VOLUME_FIELDS
+    )
+    
+    group_dates = unique_dates[order].tolist()
+    tickers = [fields['ticker'][i] for i in by_group.tolist()]
+    starts, ends = starts.tolist(), ends.tolist()
+    
+    return [
+        {
+            'coin': coin,
+            'ticker': '|'.join(tickers[starts[g]:ends[g]]),  # Combined ticker names
+            'date': group_dates[g],
+            'open_price': open_price[g],
+            'close_price': close_price[g],
+            'high_price': high_price[g],
+            'low_price': low_price[g],
+            'total_volume': total_volume[g],
+            'buy_volume': buy_volume[g],
+            'sell_volume': sell_volume[g],
+            'net_volume': net_volume[g],
+            'buy_volume_usd': buy_volume_usd[g],
+            'sell_volume_usd': sell_volume_usd[g],
+            'net_volume_usd': net_volume_usd[g],
+            'price_change_pct': price_change_pct[g]
+        }
+        for g in range(n_groups)
+    ]
 
 
 def fetch_etf_for_coin(coin: str, days: Optional[int] = None,
@@ -190,90 +481,38 @@ def fetch_etf_for_coin(coin: str, days: Optional[int] = None,
         return []
     
     session = get_session()
-    all_etf_data = {}  # date -> aggregated data
     
-    # Fetch data from each ETF
+    # Filter by days if specified. Only that window needs requesting when
+    # nothing is cached, and each ticker's rows are date-sorted, so they are
+    # trimmed before aggregating rather than aggregating all history
+    cutoff_date = start_ts = None
+    if days is not None:
+        cutoff = datetime.now() - timedelta(days=days)
+        cutoff_date = cutoff.strftime('%Y-%m-%d')
+        start_ts = _window_start_ts(cutoff)
+    
     for ticker in etf_tickers:
         if progress_callback:
             progress_callback(0, f"Fetching ETF {ticker} data...")
-        
-        try:
-            data = fetch_etf_data(ticker, session=session)
-            time.sleep(REQUEST_DELAY)  # Rate limiting between ETFs
-            
-            if not data:
-                print(f"No data for {ticker}, skipping...")
-                continue
-            
-            print(f"Fetched {len(data)} records from {ticker}")
-            
-            # Aggregate by date
-            for record in data:
-                date = record['date']
-                
-                if date not in all_etf_data:
-                    # First ETF for this date - use as base
-                    all_etf_data[date] = {
-                        'coin': coin,
-                        'ticker': ticker,  # Primary ticker
-                        'tickers': [ticker],
-                        'date': date,
-                        'open_price': record['open_price'],
-                        'close_price': record['close_price'],
-                        'high_price': record['high_price'],
-                        'low_price': record['low_price'],
-                        'total_volume': record['total_volume'],
-                        'buy_volume': record['buy_volume'],
-                        'sell_volume': record['sell_volume'],
-                        'net_volume': record['net_volume'],
-                        'buy_volume_usd': record['buy_volume_usd'],
-                        'sell_volume_usd': record['sell_volume_usd'],
-                        'net_volume_usd': record['net_volume_usd'],
-                        'price_change_pct': record['price_change_pct'],
-                        '_price_sum': record['close_price'],
-                        '_price_count': 1
-                    }
-                else:
-                    # Aggregate with existing data
-                    existing = all_etf_data[date]
-                    existing['tickers'].append(ticker)
-                    
-                    # Sum volumes (these represent total market flow)
-                    existing['total_volume'] += record['total_volume']
-                    existing['buy_volume'] += record['buy_volume']
-                    existing['sell_volume'] += record['sell_volume']
-                    existing['net_volume'] += record['net_volume']
-                    existing['buy_volume_usd'] += record['buy_volume_usd']
-                    existing['sell_volume_usd'] += record['sell_volume_usd']
-                    existing['net_volume_usd'] += record['net_volume_usd']
-                    
-                    # Average price across ETFs
-                    existing['_price_sum'] += record['close_price']
-                    existing['_price_count'] += 1
-                    existing['close_price'] = existing['_price_sum'] / existing['_price_count']
-                    
-                    # Take extremes for high/low
-                    existing['high_price'] = max(existing['high_price'], record['high_price'])
-                    existing['low_price'] = min(existing['low_price'], record['low_price'])
-                    
-        except Exception as e:
-            print(f"Error fetching {ticker}: {e}")
+    
+    # Tickers are independent, so overlap their round-trips; map() keeps
+    # results in ticker order so the first ETF per date stays the primary
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(etf_tickers))) as executor:
+        # fetch_etf_data reports request/parse errors itself and returns []
+        results = list(executor.map(
+            lambda ticker: fetch_etf_data(ticker, session=session, start_ts=start_ts), etf_tickers
+        ))
+    
+    fetched = []
+    for ticker, data in zip(etf_tickers, results):
+        if not data:
+            print(f"No data for {ticker}, skipping...")
             continue
+        
+        print(f"Fetched {len(data)} records from {ticker}")
+        fetched.extend(_rows_since(data, cutoff_date) if cutoff_date else data)
     
-    # Convert to list and clean up
-    result = []
-    for date, data in all_etf_data.items():
-        # Remove internal tracking fields
-        data.pop('_price_sum', None)
-        data.pop('_price_count', None)
-        data['ticker'] = '|'.join(data['tickers'])  # Combined ticker names
-        data.pop('tickers', None)
-        result.append(data)
-    
-    # Filter by days if specified
-    if days is not None and result:
-        cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-        result = [d for d in result if d['date'] >= cutoff_date]
+    result = aggregate_etf_records(coin, fetched)
     
     if progress_callback:
         progress_callback(len(result), f"Fetched {len(result)} aggregated ETF records for {coin}")
@@ -282,16 +521,16 @@ def fetch_etf_for_coin(coin: str, days: Optional[int] = None,
     return result
 
 
-def fetch_recent_etf_data(ticker: str, days: int = 30) -> List[Dict]:
+def fetch_recent_etf_data(ticker: str, days: int = 30) -> List[EtfRow]:
     """Fetch recent ETF data from a single ticker"""
     session = get_session()
-    data = fetch_etf_data(ticker, session=session)
+    cutoff = datetime.now() - timedelta(days=days)
+    data = fetch_etf_data(ticker, session=session, start_ts=_window_start_ts(cutoff))
     
     if not data:
         return []
     
-    cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-    return [d for d in data if d['date'] >= cutoff_date]
+    return _rows_since(data, cutoff.strftime('%Y-%m-%d'))
 
 
 if __name__ == "__main__":
@@ -4,23 +4,112 @@ Tracks futures premium, funding rates, and open interest
 Detects arbitrage opportunities and market sentiment
 """
 
+import functools
+import orjson
 import requests
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from binance_fetcher import WeightBudget
 import config
 
 
 # Binance Futures API
 FUTURES_BASE_URL = "https://fapi.binance.com/fapi/v1"
 
-# Rate limiting
-REQUEST_DELAY = 0.1
+# Cap on concurrent futures requests in one bulk call
+MAX_CONCURRENT_REQUESTS = 8
+
+# Futures request weight budget (separate from the spot API's limit)
+FUTURES_WEIGHT_LIMIT_PER_MINUTE = 2400
+PREMIUM_INDEX_WEIGHT = 1
+PREMIUM_INDEX_ALL_WEIGHT = 10
+OPEN_INTEREST_WEIGHT = 1
+_weight_budget = WeightBudget(FUTURES_WEIGHT_LIMIT_PER_MINUTE)
+
+# Funding is paid every 8h: 3 periods/day * 365 days, expressed in percent
+FUNDING_ANNUALIZATION = 3 * 365 * 100
+
+# How long an all-symbol premiumIndex snapshot is reused (seconds)
+PREMIUM_INDEX_TTL = 2.0
+_premium_indexes = None
+_premium_indexes_at = 0.0
+_premium_indexes_lock = threading.Lock()
+
+# Per-symbol reuse windows for the single-symbol fetchers (seconds). Funding
+# only changes every 8h, but its dict also carries the live mark price.
+FUTURES_PRICE_TTL = 1
+FUNDING_RATE_TTL = 15
+OPEN_INTEREST_TTL = 15
+
+
+# Shared pooled session (see get_session)
+_session = None
+_session_lock = threading.Lock()
+
+
+def _symbol_ttl_cache(seconds: float):
+    """
+    Cache a fetcher's successful results per symbol for `seconds`
+    
+    Collapses repeated lookups of the same symbol within one refresh cycle
+    (metrics, anomalies, liquidations) into a single request. Failed
+    lookups (None) are not cached. The wrapper gains cache_clear().
+    """
+    def decorator(func):
+        entries = {}  # symbol -> (fetched_at, value)
+        lock = threading.Lock()
+        
+        @functools.wraps(func)
+        def wrapper(symbol: str = "BTCUSDT", session: Optional[requests.Session] = None):
+            with lock:
+                entry = entries.get(symbol)
+            if entry is not None and time.monotonic() - entry[0] < seconds:
+                value = entry[1]
+                return dict(value) if isinstance(value, dict) else value
+            
+            value = func(symbol, session)
+            if value is not None:
+                with lock:
+                    entries[symbol] = (time.monotonic(), value)
+                return dict(value) if isinstance(value, dict) else value
+            return value
+        
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
 
 
 def get_session() -> requests.Session:
-    """Create a requests session with proxy if configured"""
+    """Get the shared requests session, creating it (with proxy if configured) on first use"""
+    global _session
+    if _session is not None:
+        return _session
+    
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+    return _session
+
+
+def _create_session() -> requests.Session:
+    """Create a pooled keep-alive requests session with retries and proxy if configured"""
     session = requests.Session()
+    # Advertise every encoding urllib3 can decode (gzip/deflate, plus br with
+    # brotli); the all-symbol premiumIndex payload compresses well
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    
+    retries = Retry(total=3, backoff_factor=0.2,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=['GET'])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
     
     proxy_url = config.get_proxy_url()
     if proxy_url:
@@ -32,6 +121,96 @@ def get_session() -> requests.Session:
     return session
 
 
+def _futures_get(path: str, params: Optional[Dict] = None, weight: int = 1,
+                 session: Optional[requests.Session] = None) -> requests.Response:
+    """GET a futures endpoint within the shared weight budget"""
+    if session is None:
+        session = get_session()
+    
+    _weight_budget.acquire(weight)
+    response = session.get(f"{FUTURES_BASE_URL}/{path}", params=params, timeout=10)
+    
+    used = response.headers.get('X-MBX-USED-WEIGHT-1M')
+    if used and used.isdigit():
+        _weight_budget.sync_used(int(used))
+    
+    # Rate limited (429) or IP banned (418): stop every thread until Retry-After
+    if response.status_code in (418, 429):
+        retry_after = response.headers.get('Retry-After', '')
+        _weight_budget.back_off(int(retry_after) if retry_after.isdigit() else 60)
+    
+    return response
+
+
+def get_all_premium_indexes(session: Optional[requests.Session] = None) -> Dict[str, Dict]:
+    """
+    Get the premiumIndex entry of every futures symbol from a single call
+    
+    premiumIndex without a symbol returns all symbols at once. The result is
+    kept for PREMIUM_INDEX_TTL seconds so per-coin lookups made right after a
+    bulk fetch reuse it.
+    
+    Args:
+        session: Optional requests session
+    
+    Returns:
+        Dictionary of symbol -> raw premiumIndex entry (empty on error)
+    """
+    global _premium_indexes, _premium_indexes_at
+    
+    if session is None:
+        session = get_session()
+    
+    with _premium_indexes_lock:
+        if _premium_indexes is not None and time.monotonic() - _premium_indexes_at < PREMIUM_INDEX_TTL:
+            return _premium_indexes
+        
+        try:
+            response = _futures_get("premiumIndex", weight=PREMIUM_INDEX_ALL_WEIGHT, session=session)
+            response.raise_for_status()
+            _premium_indexes = {row['symbol']: row for row in orjson.loads(response.content)}
+            _premium_indexes_at = time.monotonic()
+        except Exception as e:
+            print(f"Error fetching premium indexes: {e}")
+            return {}
+        
+        return _premium_indexes
+
+
+def _fetch_premium_index(symbol: str, session: requests.Session) -> Dict:
+    """
+    Fetch the raw premiumIndex entry for a symbol (mark/index price + funding)
+    
+    Served from a fresh get_all_premium_indexes() snapshot when there is one.
+    
+    Raises:
+        requests.exceptions.RequestException on HTTP errors,
+        orjson.JSONDecodeError on a malformed body
+    """
+    snapshot = _premium_indexes
+    if snapshot is not None and time.monotonic() - _premium_indexes_at < PREMIUM_INDEX_TTL:
+        if symbol in snapshot:
+            return snapshot[symbol]
+    
+    response = _futures_get("premiumIndex", params={"symbol": symbol},
+                            weight=PREMIUM_INDEX_WEIGHT, session=session)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def _funding_from_premium(symbol: str, data: Dict) -> Dict:
+    """Build the get_funding_rate() dict from a premiumIndex entry"""
+    return {
+        'symbol': symbol,
+        'funding_rate': float(data['lastFundingRate']),
+        'next_funding_time': data['nextFundingTime'],
+        'mark_price': float(data['markPrice']),
+        'index_price': float(data['indexPrice']),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+@_symbol_ttl_cache(FUTURES_PRICE_TTL)
 def get_futures_price(symbol: str = "BTCUSDT", session: Optional[requests.Session] = None) -> Optional[float]:
     """
     Get current futures mark price
@@ -47,15 +226,13 @@ def get_futures_price(symbol: str = "BTCUSDT", session: Optional[requests.Sessio
         session = get_session()
     
     try:
-        response = session.get(f"{FUTURES_BASE_URL}/premiumIndex", params={"symbol": symbol}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        return float(data['markPrice'])
+        return float(_fetch_premium_index(symbol, session)['markPrice'])
     except Exception as e:
         print(f"Error fetching futures price for {symbol}: {e}")
         return None
 
 
+@_symbol_ttl_cache(FUNDING_RATE_TTL)
 def get_funding_rate(symbol: str = "BTCUSDT", session: Optional[requests.Session] = None) -> Optional[Dict]:
     """
     Get current funding rate
@@ -65,29 +242,19 @@ def get_funding_rate(symbol: str = "BTCUSDT", session: Optional[requests.Session
         session: Optional requests session
     
     Returns:
-        Dictionary with funding rate info
+        Dictionary with funding rate info (also carries mark and index price)
     """
     if session is None:
         session = get_session()
     
     try:
-        response = session.get(f"{FUTURES_BASE_URL}/premiumIndex", params={"symbol": symbol}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        return {
-            'symbol': symbol,
-            'funding_rate': float(data['lastFundingRate']),
-            'next_funding_time': data['nextFundingTime'],
-            'mark_price': float(data['markPrice']),
-            'index_price': float(data['indexPrice']),
-            'timestamp': datetime.now().isoformat()
-        }
+        return _funding_from_premium(symbol, _fetch_premium_index(symbol, session))
     except Exception as e:
         print(f"Error fetching funding rate for {symbol}: {e}")
         return None
 
 
+@_symbol_ttl_cache(OPEN_INTEREST_TTL)
 def get_open_interest(symbol: str = "BTCUSDT", session: Optional[requests.Session] = None) -> Optional[Dict]:
     """
     Get open interest statistics
@@ -103,9 +270,10 @@ def get_open_interest(symbol: str = "BTCUSDT", session: Optional[requests.Sessio
         session = get_session()
     
     try:
-        response = session.get(f"{FUTURES_BASE_URL}/openInterest", params={"symbol": symbol}, timeout=10)
+        response = _futures_get("openInterest", params={"symbol": symbol},
+                                weight=OPEN_INTEREST_WEIGHT, session=session)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         return {
             'symbol': symbol,
@@ -148,10 +316,64 @@ def get_futures_metrics(coin: str = "BTC", spot_price: Optional[float] = None) -
     symbol = f"{coin}USDT"
     session = get_session()
     
-    # Get futures data
-    funding_data = get_funding_rate(symbol, session)
-    oi_data = get_open_interest(symbol, session)
+    # Get futures data; premiumIndex (price + funding) and openInterest are
+    # separate endpoints, so request them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        funding_future = executor.submit(get_funding_rate, symbol, session)
+        oi_future = executor.submit(get_open_interest, symbol, session)
+        funding_data = funding_future.result()
+        oi_data = oi_future.result()
+    
+    return _build_metrics(coin, symbol, funding_data, oi_data, spot_price)
+
+
+def get_futures_metrics_bulk(coins: List[str],
+                             spot_prices: Optional[Dict[str, float]] = None) -> Dict[str, Dict]:
+    """
+    Get futures metrics for several coins with one premiumIndex request
+    
+    Open interest has no all-symbol endpoint, so it is fetched per coin,
+    concurrently with each other and with the premiumIndex request.
     
+    Args:
+        coins: Base coins (BTC, ETH, etc.)
+        spot_prices: Optional coin -> spot price (index price used otherwise)
+    
+    Returns:
+        Dictionary of coin -> metrics (coins without a futures market are omitted)
+    """
+    session = get_session()
+    spot_prices = spot_prices or {}
+    coins = list(dict.fromkeys(coins))
+    if not coins:
+        return {}
+    
+    # The all-symbol premiumIndex call and every coin's openInterest call are
+    # independent, so issue them together: total latency is the slowest one
+    # rather than premiumIndex + openInterest per coin
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(coins) + 1)) as executor:
+        premium_future = executor.submit(get_all_premium_indexes, session)
+        oi_futures = {coin: executor.submit(get_open_interest, f"{coin}USDT", session) for coin in coins}
+        premium_indexes = premium_future.result()
+        oi_by_coin = {coin: future.result() for coin, future in oi_futures.items()}
+    
+    symbols = {coin: f"{coin}USDT" for coin in coins if f"{coin}USDT" in premium_indexes}
+    
+    results = {}
+    for coin, symbol in symbols.items():
+        try:
+            funding_data = _funding_from_premium(symbol, premium_indexes[symbol])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Error parsing funding rate for {symbol}: {e}")
+            continue
+        results[coin] = _build_metrics(coin, symbol, funding_data, oi_by_coin[coin], spot_prices.get(coin))
+    
+    return results
+
+
+def _build_metrics(coin: str, symbol: str, funding_data: Optional[Dict],
+                   oi_data: Optional[Dict], spot_price: Optional[float]) -> Optional[Dict]:
+    """Combine funding/OI data into the get_futures_metrics() dict"""
     if not funding_data:
         return None
     
@@ -170,7 +392,7 @@ def get_futures_metrics(coin: str = "BTC", spot_price: Optional[float] = None) -
         'futures_price': futures_price,
         'premium_pct': round(premium, 4),
         'funding_rate': funding_data['funding_rate'],
-        'funding_rate_annualized': round(funding_data['funding_rate'] * 3 * 365 * 100, 2),  # 8h periods
+        'funding_rate_annualized': round(funding_data['funding_rate'] * FUNDING_ANNUALIZATION, 2),
         'next_funding_time': funding_data['next_funding_time'],
         'open_interest': oi_data['open_interest'] if oi_data else None,
         'timestamp': datetime.now().isoformat()
@@ -190,6 +412,7 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
         List of anomaly alerts
     """
     alerts = []
+    coin = metrics['coin']
     
     premium = metrics.get('premium_pct', 0)
     funding_rate = metrics.get('funding_rate', 0)
@@ -199,7 +422,7 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
     if premium > 0.5:  # >0.5% premium
         alerts.append({
             'type': 'high_futures_premium',
-            'coin': metrics['coin'],
+            'coin': coin,
             'severity': 'high' if premium > 1.0 else 'medium',
             'premium_pct': premium,
             'description': f"High futures premium: {premium:.2f}% - Market overheating"
@@ -209,7 +432,7 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
     elif premium < -0.5:  # <-0.5% discount
         alerts.append({
             'type': 'futures_discount',
-            'coin': metrics['coin'],
+            'coin': coin,
             'severity': 'high' if premium < -1.0 else 'medium',
             'premium_pct': premium,
             'description': f"Futures trading at discount: {premium:.2f}% - Market fear"
@@ -219,7 +442,7 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
     if funding_annualized > 50:  # >50% annualized
         alerts.append({
             'type': 'extreme_funding_rate',
-            'coin': metrics['coin'],
+            'coin': coin,
             'severity': 'critical' if funding_annualized > 100 else 'high',
             'funding_rate': funding_rate,
             'funding_annualized': funding_annualized,
@@ -230,7 +453,7 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
     elif funding_annualized < -50:  # <-50% annualized
         alerts.append({
             'type': 'extreme_negative_funding',
-            'coin': metrics['coin'],
+            'coin': coin,
             'severity': 'critical' if funding_annualized < -100 else 'high',
             'funding_rate': funding_rate,
             'funding_annualized': funding_annualized,
@@ -241,7 +464,7 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
     if premium < -0.3 and funding_rate < -0.01:
         alerts.append({
             'type': 'backwardation_signal',
-            'coin': metrics['coin'],
+            'coin': coin,
             'severity': 'medium',
             'premium_pct': premium,
             'funding_rate': funding_rate,
@@ -252,24 +475,29 @@ def detect_futures_anomalies(metrics: Dict) -> List[Dict]:
     elif premium > 0.3 and funding_rate > 0.01:
         alerts.append({
             'type': 'contango_warning',
-            'coin': metrics['coin'],
+            'coin': coin,
             'severity': 'medium',
             'premium_pct': premium,
             'funding_rate': funding_rate,
             'description': f"High contango + positive funding - Potential bearish setup"
         })
     
-    # Add timestamp to all alerts
-    for alert in alerts:
-        alert['timestamp'] = metrics['timestamp']
-        alert['spot_price'] = metrics['spot_price']
-        alert['futures_price'] = metrics['futures_price']
+    # Add timestamp and prices to all alerts
+    if alerts:
+        snapshot = {
+            'timestamp': metrics['timestamp'],
+            'spot_price': metrics['spot_price'],
+            'futures_price': metrics['futures_price']
+        }
+        for alert in alerts:
+            alert.update(snapshot)
     
     return alerts
 
 
 def get_liquidation_estimates(symbol: str = "BTCUSDT", 
-                               session: Optional[requests.Session] = None) -> Optional[Dict]:
+                               session: Optional[requests.Session] = None,
+                               mark_price: Optional[float] = None) -> Optional[Dict]:
     """
     Estimate liquidation zones using leverage and OI data
     Note: This is estimated data, not actual liquidations
@@ -277,6 +505,8 @@ def get_liquidation_estimates(symbol: str = "BTCUSDT",
     Args:
         symbol: Futures symbol
         session: Optional requests session
+        mark_price: Current mark price if already known (e.g. from
+            get_futures_metrics); skips the premiumIndex request
     
     Returns:
         Liquidation estimates
@@ -285,12 +515,12 @@ def get_liquidation_estimates(symbol: str = "BTCUSDT",
         session = get_session()
     
     try:
-        # Get current price and OI
-        funding_data = get_funding_rate(symbol, session)
-        if not funding_data:
-            return None
-        
-        mark_price = funding_data['mark_price']
+        # Get current price
+        if mark_price is None:
+            funding_data = get_funding_rate(symbol, session)
+            if not funding_data:
+                return None
+            mark_price = funding_data['mark_price']
         
         # Estimate liquidation zones (simplified)
         # Assume average leverage of 10x
@@ -342,7 +572,7 @@ if __name__ == "__main__":
     
     # Test liquidation estimates
     print("\nLiquidation Estimates:")
-    liq_data = get_liquidation_estimates("BTCUSDT")
+    liq_data = get_liquidation_estimates("BTCUSDT", mark_price=metrics['futures_price'] if metrics else None)
     if liq_data:
         print(f"  Current: ${liq_data['current_price']:,.2f}")
         print(f"  Long Liq Zone: ${liq_data['long_liquidation_zone']:,.2f}")
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for BTC Market Volume Tracker
+Read automatically by gunicorn from the working directory
+"""
+
+import os
+
+
+def pre_fork(server, worker):
+    """
+    Close the master's SQLite connections before forking a worker
+    
+    With --preload the master imports the app, and db.init_database() leaves
+    the main thread's connection open. A forked worker would inherit that
+    handle (and its POSIX locks) and reuse it from its own main thread, which
+    SQLite does not support. Workers open their own connections instead.
+    """
+    import database as db
+    
+    db.close_all_connections()
+
+
+def post_fork(server, worker):
+    """
+    Pre-warm each worker's indicator memo, and start the daily sync
+    scheduler in one serving worker (RUN_SCHEDULER=1)
+    """
+    import wsgi
+    
+    wsgi.prewarm_worker()
+    if os.environ.get('RUN_SCHEDULER') == '1':
+        wsgi.start_scheduler_once()
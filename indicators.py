@@ -4,10 +4,22 @@ Provides VWAP, RSI, MACD, Bollinger Bands, Z-Score analysis
 """
 
 import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
 
+def _nan_to_none(values: np.ndarray, length: int = 0) -> List[Optional[float]]:
+    """Convert a float array to a list, mapping NaN padding back to None"""
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    result = result.tolist()
+    if len(result) < length:
+        result.extend([None] * (length - len(result)))
+    return result
+
+
 def calculate_vwap(data: List[Dict]) -> List[Dict]:
     """
     Calculate Volume Weighted Average Price
@@ -18,22 +30,38 @@ def calculate_vwap(data: List[Dict]) -> List[Dict]:
     Returns:
         List with added 'vwap' field
     """
-    for candle in data:
-        typical_price = (candle['high_price'] + candle['low_price'] + candle['close_price']) / 3
+    n = len(data)
+    typical_prices, price_volumes, vwaps = _vwap_arrays(
+        np.fromiter((d['high_price'] for d in data), dtype=float, count=n),
+        np.fromiter((d['low_price'] for d in data), dtype=float, count=n),
+        np.fromiter((d['close_price'] for d in data), dtype=float, count=n),
+        np.fromiter((d['total_volume'] for d in data), dtype=float, count=n),
+    )
+    
+    for candle, typical_price, price_volume, vwap in zip(data, typical_prices.tolist(),
+                                                         price_volumes.tolist(), vwaps.tolist()):
         candle['typical_price'] = typical_price
-        candle['price_volume'] = typical_price * candle['total_volume']
-    
-    cumulative_pv = 0
-    cumulative_volume = 0
-    
-    for candle in data:
-        cumulative_pv += candle['price_volume']
-        cumulative_volume += candle['total_volume']
-        candle['vwap'] = cumulative_pv / cumulative_volume if cumulative_volume > 0 else candle['close_price']
+        candle['price_volume'] = price_volume
+        candle['vwap'] = vwap
     
     return data
 
 
+def _vwap_arrays(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                 volumes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Typical price, price * volume and cumulative VWAP over float arrays"""
+    typical_prices = (highs + lows + closes) / 3
+    price_volumes = typical_prices * volumes
+    
+    # Running totals; fall back to the close until any volume has traded
+    cumulative_pv = np.cumsum(price_volumes)
+    cumulative_volume = np.cumsum(volumes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwaps = np.where(cumulative_volume > 0, cumulative_pv / cumulative_volume, closes)
+    
+    return typical_prices, price_volumes, vwaps
+
+
 def calculate_rsi(prices: List[float], period: int = 14) -> List[Optional[float]]:
     """
     Calculate Relative Strength Index
@@ -45,53 +73,38 @@ def calculate_rsi(prices: List[float], period: int = 14) -> List[Optional[float]
     Returns:
         List of RSI values (None for initial values)
     """
-    if len(prices) < period + 1:
-        return [None] * len(prices)
-    
-    rsi_values = [None] * period
-    
-    # Calculate initial average gain and loss
-    gains = []
-    losses = []
-    
-    for i in range(1, period + 1):
-        change = prices[i] - prices[i - 1]
-        if change > 0:
-            gains.append(change)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(change))
-    
-    avg_gain = sum(gains) / period
-    avg_loss = sum(losses) / period
-    
-    # Calculate first RSI
-    if avg_loss == 0:
-        rsi_values.append(100)
-    else:
-        rs = avg_gain / avg_loss
-        rsi_values.append(100 - (100 / (1 + rs)))
-    
-    # Calculate subsequent RSI values using smoothed averages
-    for i in range(period + 1, len(prices)):
-        change = prices[i] - prices[i - 1]
-        
-        if change > 0:
-            gain = change
-            loss = 0
-        else:
-            gain = 0
-            loss = abs(change)
-        
+    return _nan_to_none(_rsi_array(np.asarray(prices, dtype=float), period))
+
+
+def _rsi_array(closes: np.ndarray, period: int) -> np.ndarray:
+    """RSI over a float array, NaN until `period` changes are available"""
+    rsi_values = np.full(len(closes), np.nan)
+    if len(closes) < period + 1:
+        return rsi_values
+    
+    # Split price changes into gains and losses in one vectorized pass
+    changes = np.diff(closes)
+    gains = np.where(changes > 0, changes, 0.0).tolist()
+    losses = np.where(changes > 0, 0.0, -changes).tolist()
+    
+    # Wilder smoothing is recursive, so run it as a tight loop over floats
+    avg_gains = [sum(gains[:period]) / period]
+    avg_losses = [sum(losses[:period]) / period]
+    avg_gain = avg_gains[0]
+    avg_loss = avg_losses[0]
+    
+    for gain, loss in zip(gains[period:], losses[period:]):
         avg_gain = (avg_gain * (period - 1) + gain) / period
         avg_loss = (avg_loss * (period - 1) + loss) / period
-        
-        if avg_loss == 0:
-            rsi_values.append(100)
-        else:
-            rs = avg_gain / avg_loss
-            rsi_values.append(100 - (100 / (1 + rs)))
+        avg_gains.append(avg_gain)
+        avg_losses.append(avg_loss)
+    
+    avg_gains = np.array(avg_gains)
+    avg_losses = np.array(avg_losses)
+    
+    # RSI is 100 wherever there were no losses in the smoothing window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi_values[period:] = np.where(avg_losses == 0, 100.0, 100 - (100 / (1 + avg_gains / avg_losses)))
     
     return rsi_values
 
@@ -109,56 +122,73 @@ def calculate_macd(prices: List[float], fast: int = 12, slow: int = 26, signal:
     Returns:
         Dictionary with 'macd', 'signal', 'histogram' lists
     """
-    def ema(values: List[float], period: int) -> List[Optional[float]]:
-        """Calculate Exponential Moving Average"""
-        ema_values = [None] * (period - 1)
-        multiplier = 2 / (period + 1)
-        
-        # Initial SMA
-        ema_values.append(sum(values[:period]) / period)
-        
-        # Calculate EMA
-        for i in range(period, len(values)):
-            ema_val = (values[i] - ema_values[-1]) * multiplier + ema_values[-1]
-            ema_values.append(ema_val)
-        
-        return ema_values
-    
-    fast_ema = ema(prices, fast)
-    slow_ema = ema(prices, slow)
-    
-    # Calculate MACD line
-    macd_line = []
-    for i in range(len(prices)):
-        if fast_ema[i] is not None and slow_ema[i] is not None:
-            macd_line.append(fast_ema[i] - slow_ema[i])
-        else:
-            macd_line.append(None)
-    
-    # Calculate signal line (EMA of MACD)
-    macd_valid = [x for x in macd_line if x is not None]
-    if len(macd_valid) >= signal:
-        signal_ema = ema(macd_valid, signal)
-        # Pad with None to match length
-        signal_line = [None] * (len(macd_line) - len(signal_ema)) + signal_ema
-    else:
-        signal_line = [None] * len(macd_line)
-    
-    # Calculate histogram
-    histogram = []
-    for i in range(len(macd_line)):
-        if macd_line[i] is not None and signal_line[i] is not None:
-            histogram.append(macd_line[i] - signal_line[i])
-        else:
-            histogram.append(None)
+    macd_line, signal_line, histogram = _macd_arrays(np.asarray(prices, dtype=float), fast, slow, signal)
     
     return {
-        'macd': macd_line,
-        'signal': signal_line,
-        'histogram': histogram
+        'macd': _nan_to_none(macd_line),
+        'signal': _nan_to_none(signal_line),
+        'histogram': _nan_to_none(histogram)
     }
 
 
+def _macd_arrays(closes: np.ndarray, fast: int, slow: int,
+                 signal: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD line, signal line and histogram over a float array (NaN padded)
+    
+    The fast, slow and signal EMAs are advanced together in a single
+    streaming pass instead of one pass per EMA. Each EMA is seeded with
+    the SMA of its first `period` inputs, so the signal line starts once
+    `signal` MACD values exist.
+    """
+    prices = closes.tolist()
+    n = len(prices)
+    macd_line = np.full(n, np.nan)
+    signal_line = np.full(n, np.nan)
+    
+    # MACD line is only defined once both EMAs are seeded
+    start = max(fast, slow) - 1
+    if n <= start:
+        return macd_line, signal_line, macd_line - signal_line
+    
+    fast_mult = 2 / (fast + 1)
+    slow_mult = 2 / (slow + 1)
+    signal_mult = 2 / (signal + 1)
+    
+    # Seed both price EMAs and catch them up to the first MACD point
+    fast_ema = sum(prices[:fast]) / fast
+    for price in prices[fast:start + 1]:
+        fast_ema = (price - fast_ema) * fast_mult + fast_ema
+    slow_ema = sum(prices[:slow]) / slow
+    for price in prices[slow:start + 1]:
+        slow_ema = (price - slow_ema) * slow_mult + slow_ema
+    
+    # Collect the MACD values that seed the signal EMA
+    macd_values = [fast_ema - slow_ema]
+    for price in prices[start + 1:start + signal]:
+        fast_ema = (price - fast_ema) * fast_mult + fast_ema
+        slow_ema = (price - slow_ema) * slow_mult + slow_ema
+        macd_values.append(fast_ema - slow_ema)
+    
+    # Fused pass: advance all three EMAs per price
+    signal_values = []
+    if len(macd_values) >= signal:
+        signal_ema = sum(macd_values) / signal
+        signal_values.append(signal_ema)
+        for price in prices[start + signal:]:
+            fast_ema = (price - fast_ema) * fast_mult + fast_ema
+            slow_ema = (price - slow_ema) * slow_mult + slow_ema
+            macd = fast_ema - slow_ema
+            signal_ema = (macd - signal_ema) * signal_mult + signal_ema
+            macd_values.append(macd)
+            signal_values.append(signal_ema)
+    
+    macd_line[start:] = macd_values
+    signal_line[n - len(signal_values):] = signal_values
+    
+    return macd_line, signal_line, macd_line - signal_line
+
+
 def calculate_bollinger_bands(prices: List[float], period: int = 20, std_dev: float = 2.0) -> Dict[str, List[Optional[float]]]:
     """
     Calculate Bollinger Bands
@@ -171,27 +201,31 @@ def calculate_bollinger_bands(prices: List[float], period: int = 20, std_dev: fl
     Returns:
         Dictionary with 'upper', 'middle', 'lower' bands
     """
-    upper = [None] * (period - 1)
-    middle = [None] * (period - 1)
-    lower = [None] * (period - 1)
-    
-    for i in range(period - 1, len(prices)):
-        window = prices[i - period + 1:i + 1]
-        sma = sum(window) / period
-        variance = sum((x - sma) ** 2 for x in window) / period
-        std = math.sqrt(variance)
-        
-        middle.append(sma)
-        upper.append(sma + (std_dev * std))
-        lower.append(sma - (std_dev * std))
+    upper, middle, lower = _bollinger_arrays(np.asarray(prices, dtype=float), period, std_dev)
     
+    # Short series still get the full period - 1 leading None entries
     return {
-        'upper': upper,
-        'middle': middle,
-        'lower': lower
+        'upper': _nan_to_none(upper, period - 1),
+        'middle': _nan_to_none(middle, period - 1),
+        'lower': _nan_to_none(lower, period - 1)
     }
 
 
+def _bollinger_arrays(closes: np.ndarray, period: int,
+                      std_dev: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Upper, middle and lower bands over a float array (NaN padded)"""
+    middle = np.full(len(closes), np.nan)
+    std = np.full(len(closes), np.nan)
+    
+    # Mean and population std of every full window in one vectorized pass
+    if len(closes) >= period:
+        windows = sliding_window_view(closes, period)
+        middle[period - 1:] = windows.mean(axis=1)
+        std[period - 1:] = windows.std(axis=1)
+    
+    return middle + (std_dev * std), middle, middle - (std_dev * std)
+
+
 def calculate_volume_zscore(volumes: List[float], window: int = 20) -> List[Optional[float]]:
     """
     Calculate Z-Score for volume to detect anomalies
@@ -203,19 +237,23 @@ def calculate_volume_zscore(volumes: List[float], window: int = 20) -> List[Opti
     Returns:
         List of Z-scores
     """
-    zscores = [None] * (window - 1)
-    
-    for i in range(window - 1, len(volumes)):
-        window_data = volumes[i - window + 1:i + 1]
-        mean = sum(window_data) / window
-        variance = sum((x - mean) ** 2 for x in window_data) / window
-        std = math.sqrt(variance)
-        
-        if std > 0:
-            zscore = (volumes[i] - mean) / std
-            zscores.append(zscore)
-        else:
-            zscores.append(0)
+    return _nan_to_none(_volume_zscore_array(np.asarray(volumes, dtype=float), window), window - 1)
+
+
+def _volume_zscore_array(volumes: np.ndarray, window: int) -> np.ndarray:
+    """Rolling volume z-scores over a float array, NaN until a full window"""
+    zscores = np.full(len(volumes), np.nan)
+    if len(volumes) < window:
+        return zscores
+    
+    windows = sliding_window_view(volumes, window)
+    mean = windows.mean(axis=1)
+    std = windows.std(axis=1)
+    
+    # Flat windows have no spread, report a z-score of 0 for them
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current = volumes[window - 1:]
+        zscores[window - 1:] = np.where(std > 0, (current - mean) / std, 0)
     
     return zscores
 
@@ -236,10 +274,40 @@ def detect_volume_anomaly(volume: float, historical_volumes: List[float],
     if len(historical_volumes) < 10:
         return False, 0.0
     
-    mean = sum(historical_volumes) / len(historical_volumes)
-    variance = sum((x - mean) ** 2 for x in historical_volumes) / len(historical_volumes)
-    std = math.sqrt(variance)
+    # NumPy's call overhead only pays off on long histories; the usual
+    # 20-30 day baseline is cheaper as a single-pass Welford accumulator
+    if len(historical_volumes) >= 128:
+        arr = np.asarray(historical_volumes, dtype=float)
+        mean = float(arr.mean())
+        std = float(arr.std())
+    else:
+        count = 0
+        mean = 0.0
+        sum_sq = 0.0
+        for x in historical_volumes:
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            sum_sq += delta * (x - mean)
+        std = math.sqrt(sum_sq / count)
+    
+    return detect_zscore_anomaly(volume, mean, std, threshold)
+
+
+def detect_zscore_anomaly(volume: float, mean: float, std: float,
+                          threshold: float = 2.5) -> Tuple[bool, float]:
+    """
+    Detect if current volume is anomalous given a precomputed baseline
     
+    Args:
+        volume: Current volume
+        mean: Mean of the historical volumes
+        std: Standard deviation of the historical volumes
+        threshold: Z-score threshold (default 2.5 = ~99% confidence)
+    
+    Returns:
+        Tuple of (is_anomaly, z_score)
+    """
     if std == 0:
         return False, 0.0
     
@@ -249,6 +317,50 @@ def detect_volume_anomaly(volume: float, historical_volumes: List[float],
     return is_anomaly, zscore
 
 
+def calculate_trailing_mean_std(values: List[float], window: int = 30) -> List[Optional[Tuple[float, float]]]:
+    """
+    Mean and standard deviation of the values preceding each point
+    
+    Entry i describes values[max(0, i - window):i], i.e. the same history
+    slice detect_volume_anomaly() would be given for point i, but computed
+    for the whole series at once instead of re-slicing per point.
+    
+    Args:
+        values: List of values (sorted by date ascending)
+        window: Maximum number of preceding values (default 30)
+    
+    Returns:
+        List of (mean, std) tuples (None for the first point)
+    """
+    arr = np.asarray(values, dtype=float)
+    n = len(arr)
+    means = np.full(n, np.nan)
+    stds = np.full(n, np.nan)
+    
+    # Points with a full window: one vectorized pass over a sliding view
+    if n > window:
+        windows = sliding_window_view(arr[:-1], window)
+        means[window:] = windows.mean(axis=1)
+        stds[window:] = windows.std(axis=1)
+    
+    # Leading points only have a partial history: take running sums of the
+    # values (shifted by the first one, so a flat history has exactly zero
+    # spread) instead of reducing every prefix separately
+    head = min(window, n) - 1
+    if head > 0:
+        counts = np.arange(1, head + 1)
+        shifted = arr[:head] - arr[0]
+        shifted_means = np.cumsum(shifted) / counts
+        variances = np.cumsum(shifted * shifted) / counts - shifted_means * shifted_means
+        means[1:head + 1] = arr[0] + shifted_means
+        stds[1:head + 1] = np.sqrt(np.maximum(variances, 0.0))
+    
+    stats = list(zip(means.tolist(), stds.tolist()))
+    if n:
+        stats[0] = None
+    return stats
+
+
 def calculate_net_volume_divergence(prices: List[float], net_volumes: List[float]) -> List[Optional[str]]:
     """
     Detect price-volume divergence (bullish/bearish signals)
@@ -263,23 +375,50 @@ def calculate_net_volume_divergence(prices: List[float], net_volumes: List[float
     if len(prices) < 5 or len(net_volumes) < 5:
         return [None] * len(prices)
     
-    signals = [None] * 4  # Not enough data for first few points
+    prices = np.asarray(prices, dtype=float)
+    net_volumes = np.asarray(net_volumes, dtype=float)
+    
+    # Look at last 5 periods: 4-lag price change and 5-wide net volume sum
+    # (summed left to right, as a running sum over the window would)
+    price_trend = prices[4:] - prices[:-4]
+    volume_trend = net_volumes[:-4] + net_volumes[1:-3] + net_volumes[2:-2] + net_volumes[3:-1] + net_volumes[4:]
+    volume_trend = volume_trend[:len(price_trend)]
     
-    for i in range(4, len(prices)):
-        # Look at last 5 periods
-        price_trend = prices[i] - prices[i - 4]
-        volume_trend = sum(net_volumes[i - 4:i + 1])
-        
-        # Bullish divergence: price down but accumulation (positive net volume)
-        if price_trend < 0 and volume_trend > 0:
-            signals.append('bullish')
-        # Bearish divergence: price up but distribution (negative net volume)
-        elif price_trend > 0 and volume_trend < 0:
-            signals.append('bearish')
-        else:
-            signals.append(None)
+    signals = np.full(len(price_trend), None, dtype=object)
+    # Bullish divergence: price down but accumulation (positive net volume)
+    signals[(price_trend < 0) & (volume_trend > 0)] = 'bullish'
+    # Bearish divergence: price up but distribution (negative net volume)
+    signals[(price_trend > 0) & (volume_trend < 0)] = 'bearish'
     
-    return signals
+    return [None] * 4 + signals.tolist()
+
+
+def latest_net_volume_divergence(prices: List[float], net_volumes: List[float]) -> Optional[str]:
+    """
+    Divergence signal for the last point only
+    
+    Same rule as calculate_net_volume_divergence(), evaluated on the final
+    5-period window without building the whole signal series.
+    
+    Args:
+        prices: List of closing prices
+        net_volumes: List of net volume values
+    
+    Returns:
+        'bullish', 'bearish', or None
+    """
+    if len(prices) < 5 or len(net_volumes) < 5:
+        return None
+    
+    i = len(prices) - 1
+    price_trend = prices[i] - prices[i - 4]
+    volume_trend = sum(net_volumes[i - 4:i + 1])
+    
+    if price_trend < 0 and volume_trend > 0:
+        return 'bullish'
+    elif price_trend > 0 and volume_trend < 0:
+        return 'bearish'
+    return None
 
 
 def calculate_obv(closes: List[float], volumes: List[float]) -> List[float]:
@@ -293,17 +432,17 @@ def calculate_obv(closes: List[float], volumes: List[float]) -> List[float]:
     Returns:
         List of OBV values
     """
-    obv = [volumes[0]]
-    
-    for i in range(1, len(closes)):
-        if closes[i] > closes[i - 1]:
-            obv.append(obv[-1] + volumes[i])
-        elif closes[i] < closes[i - 1]:
-            obv.append(obv[-1] - volumes[i])
-        else:
-            obv.append(obv[-1])
-    
-    return obv
+    return _obv_array(np.asarray(closes, dtype=float), np.asarray(volumes, dtype=float)).tolist()
+
+
+def _obv_array(closes: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+    """On-Balance Volume over float arrays"""
+    direction = np.sign(np.diff(closes))
+    
+    # Signed volume per bar (unchanged closes contribute 0), then a running sum
+    signed_volumes = volumes[:len(closes)].copy()
+    signed_volumes[1:] *= direction
+    return np.cumsum(signed_volumes)
 
 
 def enhance_volume_data_with_indicators(data: List[Dict]) -> List[Dict]:
@@ -319,32 +458,53 @@ def enhance_volume_data_with_indicators(data: List[Dict]) -> List[Dict]:
     if not data:
         return data
     
-    # Extract price and volume series
-    closes = [d['close_price'] for d in data]
-    volumes = [d['total_volume'] for d in data]
-    net_volumes = [d['net_volume'] for d in data]
-    
-    # Calculate indicators
-    data = calculate_vwap(data)
-    rsi_values = calculate_rsi(closes)
-    macd_data = calculate_macd(closes)
-    bb_data = calculate_bollinger_bands(closes)
-    volume_zscores = calculate_volume_zscore(volumes)
-    divergence_signals = calculate_net_volume_divergence(closes, net_volumes)
-    obv_values = calculate_obv(closes, volumes)
-    
-    # Add to data
-    for i, candle in enumerate(data):
-        candle['rsi'] = rsi_values[i]
-        candle['macd'] = macd_data['macd'][i]
-        candle['macd_signal'] = macd_data['signal'][i]
-        candle['macd_histogram'] = macd_data['histogram'][i]
-        candle['bb_upper'] = bb_data['upper'][i]
-        candle['bb_middle'] = bb_data['middle'][i]
-        candle['bb_lower'] = bb_data['lower'][i]
-        candle['volume_zscore'] = volume_zscores[i]
-        candle['divergence_signal'] = divergence_signals[i]
-        candle['obv'] = obv_values[i]
+    n = len(data)
+    
+    # Extract price and volume series once as contiguous arrays (SoA)
+    highs = np.fromiter((d['high_price'] for d in data), dtype=float, count=n)
+    lows = np.fromiter((d['low_price'] for d in data), dtype=float, count=n)
+    closes = np.fromiter((d['close_price'] for d in data), dtype=float, count=n)
+    volumes = np.fromiter((d['total_volume'] for d in data), dtype=float, count=n)
+    net_volumes = np.fromiter((d['net_volume'] for d in data), dtype=float, count=n)
+    
+    # Calculate indicators on the shared arrays
+    typical_prices, price_volumes, vwaps = _vwap_arrays(highs, lows, closes, volumes)
+    macd_line, macd_signal, macd_histogram = _macd_arrays(closes, 12, 26, 9)
+    bb_upper, bb_middle, bb_lower = _bollinger_arrays(closes, 20, 2.0)
+    
+    columns = zip(
+        data,
+        typical_prices.tolist(),
+        price_volumes.tolist(),
+        vwaps.tolist(),
+        _nan_to_none(_rsi_array(closes, 14)),
+        _nan_to_none(macd_line),
+        _nan_to_none(macd_signal),
+        _nan_to_none(macd_histogram),
+        _nan_to_none(bb_upper),
+        _nan_to_none(bb_middle),
+        _nan_to_none(bb_lower),
+        _nan_to_none(_volume_zscore_array(volumes, 20)),
+        calculate_net_volume_divergence(closes, net_volumes),
+        _obv_array(closes, volumes).tolist(),
+    )
+    
+    # Scatter the columns back onto the candles in one pass
+    for (candle, typical_price, price_volume, vwap, rsi, macd, signal, histogram,
+         upper, middle, lower, zscore, divergence, obv) in columns:
+        candle['typical_price'] = typical_price
+        candle['price_volume'] = price_volume
+        candle['vwap'] = vwap
+        candle['rsi'] = rsi
+        candle['macd'] = macd
+        candle['macd_signal'] = signal
+        candle['macd_histogram'] = histogram
+        candle['bb_upper'] = upper
+        candle['bb_middle'] = middle
+        candle['bb_lower'] = lower
+        candle['volume_zscore'] = zscore
+        candle['divergence_signal'] = divergence
+        candle['obv'] = obv
     
     return data
 
@@ -962,7 +962,7 @@ let currentAlerts = [];
 let currentSeverityFilter = '';
 
 async function fetchAlerts(coin, severity = null) {
-    let url = `${API_BASE}/api/alerts?coin=${coin}&limit=50`;
+    let url = `${API_BASE}/api/alerts?coin=${coin}&limit=50&metadata=false`;
     if (severity) url += `&severity=${severity}`;
     const res = await fetch(url);
     const data = await res.json();
@@ -0,0 +1,85 @@
+"""
+Tests for the versioned response cache of the volume endpoints
+
+Run from the repository root:
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The database path is read when the app is imported
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ['DATABASE_PATH'] = os.path.join(_tmpdir.name, 'test.db')
+
+import app as app_module  # noqa: E402
+import database as db  # noqa: E402
+
+
+def volume_row(day, buy, sell, coin='BTC', symbol='BTCUSDT'):
+    """Raw volume tuple in VOLUME_COLUMNS order for one daily candle"""
+    price = 100.0
+    net = buy - sell
+    return (coin, symbol, f'2024-01-{day:02d}', price, price, price, price,
+            buy + sell, buy, sell, net, buy * price, sell * price, net * price, 0.0)
+
+
+def sync_in_other_process(rows, coin='BTC'):
+    """
+    Write rows and update sync_status the way another worker's sync would:
+    this process's sync_status snapshot is left as it was, not invalidated
+    """
+    snapshot = db._sync_status_snapshot
+    db.upsert_volume_rows(rows)
+    db.update_sync_status(coin)
+    db._sync_status_snapshot = (time.monotonic(), snapshot[1])
+
+
+class VersionedSummaryCacheTest(unittest.TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        db.close_all_connections()
+        _tmpdir.cleanup()
+
+    def setUp(self):
+        app_module.cache.clear()
+        self.client = app_module.app.test_client()
+
+    def test_summary_matches_new_sync_status_while_snapshot_is_stale(self):
+        url = '/api/volumes/summary?coin=BTC'
+        db.upsert_volume_rows([volume_row(day, 10.0, 5.0) for day in range(1, 6)])
+        db.update_sync_status('BTC')
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()['date_range']['latest'], '2024-01-05')
+
+        # Load the snapshot, then let a sync land that this process doesn't see
+        self.assertEqual(db.get_date_range('BTC')['count'], 5)
+        sync_in_other_process([volume_row(day, 20.0, 5.0) for day in range(6, 11)])
+        self.assertEqual(db.get_date_range('BTC')['count'], 5)
+
+        second = self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers['ETag'], first.headers['ETag'])
+        body = second.get_json()
+        self.assertEqual(body['date_range'], {'earliest': '2024-01-01', 'latest': '2024-01-10', 'count': 10})
+        self.assertEqual(body['summary']['total_buy_volume'], 150.0)
+
+        # Served from the versioned cache entry, still consistent with its ETag
+        cached = self.client.get(url)
+        self.assertEqual(cached.headers['ETag'], second.headers['ETag'])
+        self.assertEqual(cached.get_json()['date_range'], body['date_range'])
+
+        not_modified = self.client.get(url, headers={'If-None-Match': second.headers['ETag']})
+        self.assertEqual(not_modified.status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,14 @@
 """
 Whale Detection & Smart Money Tracking
 Detects large transactions, unusual volumes, and smart money movements
+
+Alerts are plain dicts: they go straight to database.upsert_smart_alerts(),
+which stores any keys beyond its columns as the alert's metadata, and on to
+the JSON API, so there is no conversion step between detection and storage.
 """
 
+import bisect
+import numpy as np
 import requests
 import time
 from datetime import datetime, timedelta
@@ -19,9 +25,32 @@ WHALE_THRESHOLDS = {
     'mega_whale': 10_000_000     # $10M
 }
 
+# Ascending thresholds and the size class at or above each one, for bisecting
+# in classify_whale_size() (index 0 is below every threshold)
+WHALE_SIZE_BOUNDS = tuple(sorted(WHALE_THRESHOLDS.values()))
+WHALE_SIZE_CLASSES = (None,) + tuple(sorted(WHALE_THRESHOLDS, key=WHALE_THRESHOLDS.get))
+
+# Severity lookup for calculate_alert_severity(): rows are whale size ranks
+# (none/small, medium, large, mega), columns are |z-score| bins (<=2.5, >2.5,
+# >3.0, >3.5). Large and mega whales outrank any z-score.
+SIZE_CLASS_RANKS = {'medium_whale': 1, 'large_whale': 2, 'mega_whale': 3}
+ZSCORE_SEVERITY_BOUNDS = (2.5, 3.0, 3.5)
+SEVERITY_TABLE = (
+    ('low', 'medium', 'high', 'critical'),
+    ('medium', 'medium', 'high', 'critical'),
+    ('high', 'high', 'high', 'high'),
+    ('critical', 'critical', 'critical', 'critical'),
+)
+
 # Volume anomaly threshold (Z-score)
 VOLUME_ANOMALY_THRESHOLD = 2.5  # ~99% confidence
 
+# Number of preceding candles used as the baseline for each scanned candle
+HISTORY_WINDOW = 30
+
+# Volume fields checked for statistical anomalies
+ANOMALY_VOLUME_FIELDS = ['total_volume', 'buy_volume', 'sell_volume']
+
 
 def classify_whale_size(usd_value: float) -> str:
     """
@@ -33,15 +62,10 @@ def classify_whale_size(usd_value: float) -> str:
     Returns:
         Whale classification
     """
-    if usd_value >= WHALE_THRESHOLDS['mega_whale']:
-        return 'mega_whale'
-    elif usd_value >= WHALE_THRESHOLDS['large_whale']:
-        return 'large_whale'
-    elif usd_value >= WHALE_THRESHOLDS['medium_whale']:
-        return 'medium_whale'
-    elif usd_value >= WHALE_THRESHOLDS['small_whale']:
-        return 'small_whale'
-    return None
+    # Most values are below the smallest threshold; NaN also fails this check
+    if not usd_value >= WHALE_SIZE_BOUNDS[0]:
+        return None
+    return WHALE_SIZE_CLASSES[bisect.bisect_right(WHALE_SIZE_BOUNDS, usd_value)]
 
 
 def detect_whale_trades(candle_data: Dict, historical_data: List[Dict]) -> List[Dict]:
@@ -109,13 +133,34 @@ def detect_whale_trades(candle_data: Dict, historical_data: List[Dict]) -> List[
     return alerts
 
 
-def detect_volume_anomalies(candle_data: Dict, historical_data: List[Dict]) -> List[Dict]:
+def _volume_baseline(historical_data: List[Dict]) -> Dict[str, Tuple[float, float]]:
+    """
+    Mean and standard deviation of each anomaly volume field
+    
+    Args:
+        historical_data: Historical candles used as the baseline
+    
+    Returns:
+        Dict mapping each field in ANOMALY_VOLUME_FIELDS to (mean, std)
+    """
+    # One (candles x fields) matrix, reduced column-wise in a single pass
+    values = np.array([[d[field] for field in ANOMALY_VOLUME_FIELDS] for d in historical_data], dtype=float)
+    means = values.mean(axis=0).tolist()
+    stds = values.std(axis=0).tolist()
+    
+    return dict(zip(ANOMALY_VOLUME_FIELDS, zip(means, stds)))
+
+
+def detect_volume_anomalies(candle_data: Dict, historical_data: List[Dict],
+                            baseline: Optional[Dict[str, Tuple[float, float]]] = None) -> List[Dict]:
     """
     Detect unusual volume spikes using statistical analysis
     
     Args:
         candle_data: Current day's data
         historical_data: Historical data for baseline (20-30 days)
+        baseline: Optional precomputed (mean, std) of historical_data per
+            field in ANOMALY_VOLUME_FIELDS (computed from historical_data if omitted)
     
     Returns:
         List of volume anomaly alerts
@@ -125,15 +170,18 @@ def detect_volume_anomalies(candle_data: Dict, historical_data: List[Dict]) -> L
     if len(historical_data) < 10:
         return alerts
     
-    # Get historical volumes
-    hist_total_volumes = [d['total_volume'] for d in historical_data]
-    hist_buy_volumes = [d['buy_volume'] for d in historical_data]
-    hist_sell_volumes = [d['sell_volume'] for d in historical_data]
+    if baseline is None:
+        baseline = _volume_baseline(historical_data)
+    
+    total_mean, total_std = baseline['total_volume']
+    buy_mean, buy_std = baseline['buy_volume']
+    sell_mean, sell_std = baseline['sell_volume']
     
     # Check total volume anomaly
-    is_anomaly, zscore = ind.detect_volume_anomaly(
+    is_anomaly, zscore = ind.detect_zscore_anomaly(
         candle_data['total_volume'],
-        hist_total_volumes,
+        total_mean,
+        total_std,
         VOLUME_ANOMALY_THRESHOLD
     )
     
@@ -144,15 +192,16 @@ def detect_volume_anomalies(candle_data: Dict, historical_data: List[Dict]) -> L
             'date': candle_data['date'],
             'zscore': round(zscore, 2),
             'volume': candle_data['total_volume'],
-            'avg_volume': sum(hist_total_volumes) / len(hist_total_volumes),
+            'avg_volume': total_mean,
             'price': candle_data['close_price'],
             'description': f"Unusual volume spike detected (Z-score: {zscore:.2f})"
         })
     
     # Check buy volume spike
-    is_buy_anomaly, buy_zscore = ind.detect_volume_anomaly(
+    is_buy_anomaly, buy_zscore = ind.detect_zscore_anomaly(
         candle_data['buy_volume'],
-        hist_buy_volumes,
+        buy_mean,
+        buy_std,
         VOLUME_ANOMALY_THRESHOLD
     )
     
@@ -169,9 +218,10 @@ def detect_volume_anomalies(candle_data: Dict, historical_data: List[Dict]) -> L
         })
     
     # Check sell volume spike
-    is_sell_anomaly, sell_zscore = ind.detect_volume_anomaly(
+    is_sell_anomaly, sell_zscore = ind.detect_zscore_anomaly(
         candle_data['sell_volume'],
-        hist_sell_volumes,
+        sell_mean,
+        sell_std,
         VOLUME_ANOMALY_THRESHOLD
     )
     
@@ -195,7 +245,8 @@ def detect_divergence_signals(data_series: List[Dict]) -> List[Dict]:
     Detect price-volume divergence patterns
     
     Args:
-        data_series: List of recent candles (at least 5-10 days)
+        data_series: List of recent candles (at least 5-10 days), consecutive
+            and ending with the candle to check
     
     Returns:
         List of divergence alerts
@@ -205,13 +256,16 @@ def detect_divergence_signals(data_series: List[Dict]) -> List[Dict]:
     if len(data_series) < 5:
         return alerts
     
-    prices = [d['close_price'] for d in data_series]
-    net_volumes = [d['net_volume'] for d in data_series]
-    
-    # Get last divergence signal
-    signals = ind.calculate_net_volume_divergence(prices, net_volumes)
+    # Candles from enhance_volume_data_with_indicators() already carry the
+    # signal for their trailing 5-period window, so only derive it otherwise
+    if 'divergence_signal' in data_series[-1]:
+        signal = data_series[-1]['divergence_signal']
+    else:
+        prices = [d['close_price'] for d in data_series]
+        net_volumes = [d['net_volume'] for d in data_series]
+        signal = ind.latest_net_volume_divergence(prices, net_volumes)
     
-    if signals[-1] == 'bullish':
+    if signal == 'bullish':
         alerts.append({
             'type': 'bullish_divergence',
             'coin': data_series[-1]['coin'],
@@ -220,7 +274,7 @@ def detect_divergence_signals(data_series: List[Dict]) -> List[Dict]:
             'net_volume': data_series[-1]['net_volume'],
             'description': 'Bullish divergence: Price declining but accumulation detected'
         })
-    elif signals[-1] == 'bearish':
+    elif signal == 'bearish':
         alerts.append({
             'type': 'bearish_divergence',
             'coin': data_series[-1]['coin'],
@@ -279,13 +333,18 @@ def detect_rsi_extremes(data_series: List[Dict]) -> List[Dict]:
     return alerts
 
 
-def detect_all_smart_actions(current_data: Dict, historical_data: List[Dict]) -> List[Dict]:
+def detect_all_smart_actions(current_data: Dict, historical_data: List[Dict],
+                             volume_baseline: Optional[Dict[str, Tuple[float, float]]] = None,
+                             timestamp: Optional[str] = None) -> List[Dict]:
     """
     Run all detection algorithms and return combined alerts
     
     Args:
         current_data: Latest candle data
         historical_data: Historical data for context (30+ days recommended)
+        volume_baseline: Optional precomputed volume (mean, std) of historical_data
+            (see detect_volume_anomalies)
+        timestamp: Optional ISO timestamp stamped on the alerts (defaults to now)
     
     Returns:
         List of all detected smart action alerts
@@ -297,7 +356,7 @@ def detect_all_smart_actions(current_data: Dict, historical_data: List[Dict]) ->
     all_alerts.extend(whale_alerts)
     
     # Volume anomaly detection
-    volume_alerts = detect_volume_anomalies(current_data, historical_data)
+    volume_alerts = detect_volume_anomalies(current_data, historical_data, volume_baseline)
     all_alerts.extend(volume_alerts)
     
     # Divergence detection (needs multiple days)
@@ -312,9 +371,11 @@ def detect_all_smart_actions(current_data: Dict, historical_data: List[Dict]) ->
         all_alerts.extend(rsi_alerts)
     
     # Add metadata to all alerts
+    if all_alerts and timestamp is None:
+        timestamp = datetime.now().isoformat()
     for alert in all_alerts:
         if 'timestamp' not in alert:
-            alert['timestamp'] = datetime.now().isoformat()
+            alert['timestamp'] = timestamp
         if 'severity' not in alert:
             # Determine severity based on type and values
             alert['severity'] = calculate_alert_severity(alert)
@@ -322,6 +383,49 @@ def detect_all_smart_actions(current_data: Dict, historical_data: List[Dict]) ->
     return all_alerts
 
 
+def detect_smart_actions_in_series(data_series: List[Dict], days: int,
+                                   window: int = HISTORY_WINDOW) -> List[Dict]:
+    """
+    Run all detection algorithms over the most recent candles of a series
+    
+    Each candle is compared against the `window` candles before it. The volume
+    baselines for every candle are computed in one pass up front rather than
+    recomputed from a fresh history slice per candle.
+    
+    Args:
+        data_series: Candles with indicators, sorted by date ascending
+        days: Number of most recent candles to scan
+        window: Number of preceding candles used as history (default 30)
+    
+    Returns:
+        List of all detected smart action alerts
+    """
+    start = max(0, len(data_series) - days)
+    
+    # Only the scanned candles and their windows matter, so skip any older
+    # history (baselines for those candles are unchanged by the offset)
+    offset = max(0, start - window)
+    
+    # Pull every anomaly field out of the candles in one pass, one column each
+    rows = [[d[field] for field in ANOMALY_VOLUME_FIELDS] for d in data_series[offset:]]
+    volumes = np.array(rows, dtype=float).reshape(-1, len(ANOMALY_VOLUME_FIELDS)).T.copy()
+    baselines = {
+        field: ind.calculate_trailing_mean_std(column, window)
+        for field, column in zip(ANOMALY_VOLUME_FIELDS, volumes)
+    }
+    
+    # One timestamp for the whole scan instead of one per candle
+    timestamp = datetime.now().isoformat()
+    
+    alerts = []
+    for i in range(start, len(data_series)):
+        historical = data_series[max(0, i - window):i]
+        baseline = {field: stats[i - offset] for field, stats in baselines.items()}
+        alerts.extend(detect_all_smart_actions(data_series[i], historical, baseline, timestamp))
+    
+    return alerts
+
+
 def calculate_alert_severity(alert: Dict) -> str:
     """
     Calculate severity level for an alert
@@ -332,34 +436,18 @@ def calculate_alert_severity(alert: Dict) -> str:
     Returns:
         Severity level: 'critical', 'high', 'medium', 'low'
     """
-    alert_type = alert.get('type', '')
+    size_rank = SIZE_CLASS_RANKS.get(alert.get('size_class'), 0)
     
-    # Mega whale = critical
-    if alert.get('size_class') == 'mega_whale':
-        return 'critical'
+    # Number of z-score bounds strictly exceeded (0-3)
+    zscore_bin = bisect.bisect_left(ZSCORE_SEVERITY_BOUNDS, abs(alert.get('zscore', 0)))
     
-    # Large whale or very high Z-score = high
-    if alert.get('size_class') == 'large_whale':
-        return 'high'
+    severity = SEVERITY_TABLE[size_rank][zscore_bin]
     
-    zscore = abs(alert.get('zscore', 0))
-    if zscore > 3.5:
-        return 'critical'
-    elif zscore > 3.0:
-        return 'high'
-    
-    # Divergence signals = medium
-    if 'divergence' in alert_type:
-        return 'medium'
-    
-    # Medium whale or high Z-score = medium
-    if alert.get('size_class') == 'medium_whale':
-        return 'medium'
-    elif zscore > 2.5:
+    # Divergence signals are at least medium
+    if severity == 'low' and 'divergence' in alert.get('type', ''):
         return 'medium'
     
-    # Everything else = low
-    return 'low'
+    return severity
 
 
 if __name__ == "__main__":
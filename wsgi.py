@@ -0,0 +1,57 @@
+"""
+WSGI entry point for BTC Market Volume Tracker
+Used by gunicorn in production instead of the Flask dev server
+
+Run with:
+    gunicorn wsgi:application --preload -k gthread --workers 2 --threads 4 --bind 0.0.0.0:$PORT
+
+Set RUN_SCHEDULER=1 to run the daily sync scheduler. The gunicorn master only
+forks workers and serves no requests, so the scheduler is started after fork
+(see the post_fork hook in gunicorn.conf.py) inside exactly one serving worker,
+chosen by an exclusive lock on a file next to the database. Its sync, cache
+clear and indicator pre-warm therefore run in a process that answers traffic,
+and if that worker exits the lock is released and its replacement takes over.
+"""
+
+import fcntl
+import os
+from app import app, init_scheduler, prewarm_indicators
+import config
+
+application = app
+
+scheduler = None
+
+# Held open for the life of the worker that owns the scheduler
+_scheduler_lock = None
+
+
+def prewarm_worker():
+    """Pre-warm this worker's indicator memo for every configured coin"""
+    for coin in config.get_coins():
+        prewarm_indicators(coin)
+
+
+def start_scheduler_once():
+    """
+    Start the scheduler in this process if no other process is running it
+    
+    Returns:
+        The started scheduler, or None if another process holds the lock
+    """
+    global scheduler, _scheduler_lock
+    
+    if scheduler is not None:
+        return scheduler
+    
+    lock_file = open(f"{config.get_database_path()}.scheduler.lock", 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    
+    _scheduler_lock = lock_file
+    scheduler = init_scheduler()
+    print(f"Scheduler running in worker {os.getpid()}")
+    return scheduler